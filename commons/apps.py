@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
 
 
 class CommonsConfig(AppConfig):
     name = 'commons'
+
+    def ready(self):
+        from .signals import connect_version_signals
+        connect_version_signals()
+        if settings.DATABASE_HEALTH_CHECKS:
+            from .db import check_connections_health
+            request_started.connect(
+                check_connections_health,
+                dispatch_uid='commons_check_connections_health'
+            )
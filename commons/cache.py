@@ -0,0 +1,146 @@
+'''
+Owner scoped cache helpers
+
+Every key is namespaced by owner and by a namespace name, and carries a
+version number stored in the cache itself, so a whole namespace of an
+owner is invalidated by bumping its version instead of looking for keys.
+
+Each owned model has a version per owner too, bumped by commons.signals
+when any object of the owner changes. Keys built with make_models_key
+carry the versions of the models their value was computed from.
+'''
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+_MISSING = object()
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.COMMONS_CACHE_ALIAS]
+
+
+def get_owner_id(owner):
+    return owner if isinstance(owner, int) else owner.pk
+
+
+def get_owner_key(owner, *parts):
+    return ':'.join(['owner', str(get_owner_id(owner))] + [str(part) for part in parts])
+
+
+def get_version_key(owner, namespace):
+    return get_owner_key(owner, namespace, 'version')
+
+
+def get_namespace_version(owner, namespace):
+    '''
+    Return the current version of the namespace for the owner. A missing
+    version starts from the current time, so an evicted counter never goes
+    back to a value used by older keys
+    '''
+    cache = get_cache()
+    key = get_version_key(owner, namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_namespace(owner, namespace):
+    '''
+    Bump the version of the namespace, every key built with the previous
+    version stops being read
+    '''
+    cache = get_cache()
+    key = get_version_key(owner, namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, None)
+        return version
+
+
+def make_key(owner, namespace, *parts):
+    version = get_namespace_version(owner, namespace)
+    return get_owner_key(owner, namespace, 'v{}'.format(version), *parts)
+
+
+def get_model_namespace(model):
+    label = model if isinstance(model, str) else model._meta.label
+    return 'model:{}'.format(label)
+
+
+def get_model_version(owner, model):
+    return get_namespace_version(owner, get_model_namespace(model))
+
+
+def get_model_versions(owner, models):
+    '''
+    Current versions of the models for the owner, in the order of the
+    models, read with one cache query
+    '''
+    namespaces = [get_model_namespace(model) for model in models]
+    keys = [get_version_key(owner, namespace) for namespace in namespaces]
+    versions = get_cache().get_many(keys)
+    return [
+        versions[key] if key in versions else get_namespace_version(owner, namespace)
+        for key, namespace in zip(keys, namespaces)
+    ]
+
+
+def invalidate_model(owner, model):
+    '''
+    Bump the version of the model for the owner, every key built with the
+    previous version stops being read
+    '''
+    return invalidate_namespace(owner, get_model_namespace(model))
+
+
+def make_models_key(owner, namespace, models, *parts):
+    '''
+    Key of the owner namespace carrying the versions of the models, it
+    changes when any object of those models of the owner changes
+    '''
+    versions = get_model_versions(owner, models)
+    return make_key(owner, namespace, 'm{}'.format('.'.join(str(version) for version in versions)), *parts)
+
+
+def get_or_compute(owner, namespace, parts, compute, timeout=DEFAULT_TIMEOUT, models=()):
+    '''
+    Return the cached value for the owner namespace and parts, calling
+    ``compute`` and storing its result when it is not cached. The value is
+    computed again after any change of the given models
+    '''
+    cache = get_cache()
+    key = make_models_key(owner, namespace, models, *parts) if models else make_key(owner, namespace, *parts)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        record_cache_access('hits')
+        return value
+    record_cache_access('misses')
+    value = compute()
+    cache.set(key, value, timeout)
+    return value
+
+
+def record_cache_access(result):
+    with _stats_lock:
+        _stats[result] += 1
+
+
+def get_cache_stats():
+    with _stats_lock:
+        return {'hits': _stats['hits'], 'misses': _stats['misses']}
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,36 @@
+from django.db import connections, migrations
+
+
+def check_connections_health(**kwargs):
+    '''
+    Close the persistent connections that stopped working while they were
+    idle, so the request opens a new one instead of failing on first use
+    '''
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+def prefix_search_index(table, column='name'):
+    '''
+    Migration operation adding on postgresql the index of the case
+    insensitive prefix searches of an owner (``name__istartswith``), which
+    filter by UPPER(name) LIKE 'PREFIX%'
+    '''
+    index = '{}_owner_upper_{}_like'.format(table, column)
+
+    def create_index(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(
+                'CREATE INDEX {} ON {} (owner_id, UPPER({}::text) text_pattern_ops)'.format(
+                    index, table, column
+                )
+            )
+
+    def drop_index(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute('DROP INDEX IF EXISTS {}'.format(index))
+
+    return migrations.RunPython(create_index, drop_index)
@@ -0,0 +1,90 @@
+from django.core.exceptions import ValidationError
+from django.forms import ModelMultipleChoiceField
+from django.forms.models import ModelChoiceField, ModelChoiceIterator
+
+
+class CachedModelChoiceIterator(ModelChoiceIterator):
+    '''
+    Choices built from the objects of the field, evaluated once no matter
+    how many times the widget iterates them
+    '''
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.get_objects():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.get_objects()) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.get_objects())
+
+
+class OwnerModelMultipleChoiceField(ModelMultipleChoiceField):
+    '''
+    Multiple choice of the objects of a user. The form calls ``set_owner``
+    with the user of the request, the choices are evaluated once and the
+    submitted ids are validated with a single ``id__in`` and owner query,
+    whose objects are kept for rendering the form again
+    '''
+    iterator = CachedModelChoiceIterator
+
+    def _set_queryset(self, queryset):
+        self.objects = None
+        self.selected_objects = {}
+        super(OwnerModelMultipleChoiceField, self)._set_queryset(queryset)
+
+    queryset = property(ModelChoiceField._get_queryset, _set_queryset)
+
+    def set_owner(self, owner):
+        self.queryset = self.queryset.filter(owner=owner)
+
+    def get_objects(self):
+        if self.objects is None:
+            self.objects = list(self.queryset)
+        return self.objects
+
+    def get_key(self, obj):
+        return str(getattr(obj, self.to_field_name or 'pk'))
+
+    def get_selected_objects(self, values):
+        '''
+        return the objects of the given ids, querying only the ones that
+        were not validated or loaded before
+        '''
+        values = [str(value) for value in values]
+        missing = [value for value in values if value not in self.selected_objects]
+        if missing:
+            key = self.to_field_name or 'pk'
+            for obj in self.queryset.filter(**{'%s__in' % key: missing}):
+                self.selected_objects[self.get_key(obj)] = obj
+        return [self.selected_objects[value] for value in values if value in self.selected_objects]
+
+    def _check_values(self, value):
+        key = self.to_field_name or 'pk'
+        try:
+            value = frozenset(value)
+        except TypeError:
+            raise ValidationError(self.error_messages['list'], code='list')
+        model_field = self.queryset.model._meta.get_field(key) if key != 'pk' else self.queryset.model._meta.pk
+        for pk in value:
+            try:
+                model_field.to_python(pk)
+            except (ValueError, TypeError, ValidationError):
+                raise ValidationError(
+                    self.error_messages['invalid_pk_value'],
+                    code='invalid_pk_value',
+                    params={'pk': pk},
+                )
+        queryset = self.queryset.filter(**{'%s__in' % key: value})
+        self.selected_objects.update((self.get_key(obj), obj) for obj in queryset)
+        for val in value:
+            if str(val) not in self.selected_objects:
+                raise ValidationError(
+                    self.error_messages['invalid_choice'],
+                    code='invalid_choice',
+                    params={'value': val},
+                )
+        return queryset
@@ -1,19 +1,73 @@
+import threading
 import requests
 from datetime import date, datetime, time, timedelta
+from time import perf_counter, sleep
 from django.conf import settings
+from django.db import connection
 from django.urls import reverse
+from requests.adapters import HTTPAdapter
+from .signals import invalidate_models
 
+SLACK_RETRY_STATUSES = (429, 500, 502, 503, 504)
 
-def send_slack_message(slack_id, menu_id):
-    url = "{}{}".format(settings.SLACK_SERVICE_URL, slack_id)
-    link = reverse('delivery-selection', kwargs={'id': str(menu_id)})
-    message = "Hola\n El menu lo puedes encontar \n <{}{}|Aqui>\nQue tengas un bello dia"\
-        .format(settings.BASE_URL, link)
+_slack_session = None
+_slack_session_lock = threading.Lock()
 
-    headers = {
-        'content-type': 'application/json',
-    }
-    data = {
+
+def get_slack_session():
+    '''
+    Session shared by the process, keeping the connections to slack alive
+    between messages
+    '''
+    global _slack_session
+    with _slack_session_lock:
+        if _slack_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=settings.SLACK_POOL_MAXSIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _slack_session = session
+    return _slack_session
+
+
+def get_retry_delay(response, attempt):
+    retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+    if retry_after.isdigit():
+        return min(int(retry_after), settings.SLACK_MAX_RETRY_DELAY)
+    return min(settings.SLACK_BACKOFF_FACTOR * (2 ** attempt), settings.SLACK_MAX_RETRY_DELAY)
+
+
+def post_slack_payload(url, data, on_attempt=None):
+    '''
+    Post the payload as json, retrying with backoff when slack is rate
+    limiting, failing or not answering. ``on_attempt`` is called after every
+    request with the attempt number, the response or the error, and the
+    seconds it took
+    '''
+    session = get_slack_session()
+    timeout = (settings.SLACK_CONNECT_TIMEOUT, settings.SLACK_READ_TIMEOUT)
+    for attempt in range(settings.SLACK_MAX_RETRIES + 1):
+        is_last_attempt = attempt == settings.SLACK_MAX_RETRIES
+        start = perf_counter()
+        try:
+            response = session.post(url, json=data, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            if on_attempt is not None:
+                on_attempt(attempt, error, perf_counter() - start)
+            if is_last_attempt:
+                raise
+            response = None
+        else:
+            if on_attempt is not None:
+                on_attempt(attempt, response, perf_counter() - start)
+        if response is not None and (
+                response.status_code not in SLACK_RETRY_STATUSES or is_last_attempt):
+            return response
+        sleep(get_retry_delay(response, attempt))
+
+
+def get_slack_payload(message):
+    return {
         "blocks": [
             {
                 "type": "section",
@@ -24,21 +78,85 @@ def send_slack_message(slack_id, menu_id):
             }
         ]
     }
-    response = requests.post(
-        url,
-        headers=headers,
-        data=str(data)
+
+
+def get_menu_link(menu_id):
+    link = reverse('delivery-selection', kwargs={'id': str(menu_id)})
+    return "{}{}".format(settings.BASE_URL, link)
+
+
+def send_slack_message(slack_id, menu_id, on_attempt=None):
+    url = "{}{}".format(settings.SLACK_SERVICE_URL, slack_id)
+    message = "Hola\n El menu lo puedes encontar \n <{}|Aqui>\nQue tengas un bello dia"\
+        .format(get_menu_link(menu_id))
+    return post_slack_payload(url, get_slack_payload(message), on_attempt)
+
+
+def send_slack_menus(slack_id, menus, on_attempt=None):
+    '''
+    Send every menu of the list in one message, menus is a list of
+    (menu_id, name) pairs
+    '''
+    if len(menus) == 1:
+        return send_slack_message(slack_id, menus[0][0], on_attempt)
+    url = "{}{}".format(settings.SLACK_SERVICE_URL, slack_id)
+    links = "\n".join(
+        "<{}|{}>".format(get_menu_link(menu_id), name) for menu_id, name in menus
     )
-    return response
+    message = "Hola\n Los menus los puedes encontar \n{}\nQue tengas un bello dia"\
+        .format(links)
+    return post_slack_payload(url, get_slack_payload(message), on_attempt)
+
+
+def bulk_create_with_ids(model, objects):
+    '''
+    Insert the objects in bulk when the database returns the new ids, one
+    by one otherwise, so the objects always leave with their ids. The bulk
+    insert sends no signals, so the versions of the model are bumped here
+    '''
+    if connection.features.can_return_ids_from_bulk_insert:
+        objects = model.objects.bulk_create(objects)
+        invalidate_models(model, [getattr(instance, 'owner_id', None) for instance in objects])
+        return objects
+    for instance in objects:
+        instance.save()
+    return objects
 
 
-def is_number_or_string(value):
-    return isinstance(value, int) or isinstance(value, str)
+def bulk_create_m2m_rows(model, field_name, pairs):
+    '''
+    Insert the rows of a many to many field in one query, pairs are
+    (object id, related object id)
+    '''
+    field = model._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = '{}_id'.format(field.m2m_field_name())
+    target = '{}_id'.format(field.m2m_reverse_field_name())
+    return through.objects.bulk_create([
+        through(**{source: object_id, target: related_id})
+        for object_id, related_id in pairs
+    ])
 
 
-def get_index_value(elem):
-    return str(elem) if is_number_or_string(elem) else str(elem.id)
+def delete_m2m_rows(model, field_name, object_ids):
+    '''
+    Delete in one query the rows of a many to many field of the objects
+    '''
+    field = model._meta.get_field(field_name)
+    source = '{}_id__in'.format(field.m2m_field_name())
+    return field.remote_field.through.objects.filter(**{source: object_ids}).delete()
 
 
 def get_datetime(hours):
     return datetime.combine(date.today(), time()) + timedelta(hours=hours)
+
+
+def parse_date(value):
+    '''
+    date of a text with the DATE_FORMAT of the settings, None when the
+    text is not a date
+    '''
+    try:
+        return datetime.strptime(value or '', settings.DATE_FORMAT).date()
+    except ValueError:
+        return None
@@ -0,0 +1,50 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.client import Client
+
+from tags.models import Tag
+
+
+class Command(BaseCommand):
+    '''
+    Compare the throughput of creating meals with one request per meal
+    and with the bulk endpoint. Everything is rolled back at the end
+
+        python manage.py benchmark_bulk_create <username>
+    '''
+    help = 'Compare per item and bulk creation of meals through the api'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--items', type=int, default=500)
+        parser.add_argument('--host', default='localhost')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.get(username=options['username'])
+        client = Client(SERVER_NAME=options['host'])
+        client.force_login(user)
+        total = options['items']
+        with transaction.atomic():
+            tags = [Tag.objects.create(name='benchmark {}'.format(index), owner=user) for index in range(3)]
+            tag_ids = [tag.id for tag in tags]
+
+            start = time.perf_counter()
+            for index in range(total):
+                client.post('/api/meals/', {'name': 'meal {}'.format(index), 'tags': tag_ids})
+            self.write_result('per item', total, time.perf_counter() - start)
+
+            data = [{'name': 'meal {}'.format(index), 'tags': tag_ids} for index in range(total)]
+            start = time.perf_counter()
+            response = client.post('/api/meals/bulk/', json.dumps(data), content_type='application/json')
+            self.write_result('bulk', total, time.perf_counter() - start)
+            if response.status_code != 201:
+                self.stderr.write('bulk request failed with {}'.format(response.status_code))
+            transaction.set_rollback(True)
+
+    def write_result(self, title, total, seconds):
+        self.stdout.write('{:<10} {} meals in {:.2f} s, {:.0f} meals/s'.format(
+            title, total, seconds, total / seconds))
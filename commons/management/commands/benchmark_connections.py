@@ -0,0 +1,63 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.client import Client, RequestFactory
+
+
+class Command(BaseCommand):
+    '''
+    Measure the latency of an api endpoint going through the whole WSGI
+    handler, first opening a connection per request and then reusing a
+    persistent connection
+
+        python manage.py benchmark_connections <username>
+    '''
+    help = 'Compare per request latency with and without persistent connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--url', default='/api/tags/')
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--max-age', type=int, default=60)
+
+    def handle(self, *args, **options):
+        application = get_wsgi_application()
+        client = Client()
+        client.force_login(get_user_model().objects.get(username=options['username']))
+        environ = RequestFactory()._base_environ(
+            PATH_INFO=options['url'],
+            REQUEST_METHOD='GET',
+            HTTP_HOST=options['host'],
+            HTTP_COOKIE='{}={}'.format(
+                settings.SESSION_COOKIE_NAME,
+                client.cookies[settings.SESSION_COOKIE_NAME].value
+            ),
+        )
+        for title, max_age in (('new connection', 0), ('persistent', options['max_age'])):
+            latencies = self.measure(application, environ, max_age, options['requests'])
+            self.stdout.write(
+                '{:<16} mean {:.2f} ms  p50 {:.2f} ms  p95 {:.2f} ms'.format(
+                    title,
+                    statistics.mean(latencies),
+                    statistics.median(latencies),
+                    latencies[int(len(latencies) * 0.95) - 1],
+                )
+            )
+
+    def measure(self, application, environ, max_age, total):
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        latencies = []
+        for _ in range(total):
+            start = time.perf_counter()
+            response = application(dict(environ), lambda status, headers: None)
+            b''.join(response)
+            response.close()
+            latencies.append((time.perf_counter() - start) * 1000)
+        return sorted(latencies)
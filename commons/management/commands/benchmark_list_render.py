@@ -0,0 +1,61 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.client import Client
+from django.urls import reverse
+
+from commons.cache import invalidate_model
+from meals.models import Meal
+from tags.models import Tag
+
+
+class Command(BaseCommand):
+    '''
+    Compare the render time of a page of meals with the rows rendered on
+    every request and with the rows read from the fragment cache.
+    Everything is rolled back at the end
+
+        python manage.py benchmark_list_render <username>
+    '''
+    help = 'Compare cold and cached renders of the meals list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--rows', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--host', default='localhost')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.get(username=options['username'])
+        client = Client(SERVER_NAME=options['host'])
+        client.force_login(user)
+        url = reverse('meal-list')
+        with transaction.atomic():
+            tags = [Tag.objects.create(name='benchmark {}'.format(index), owner=user) for index in range(3)]
+            for index in range(options['rows']):
+                meal = Meal.objects.create(name='meal {}'.format(index), owner=user)
+                meal.tags.add(*tags)
+
+            total = options['requests']
+            seconds = 0
+            for _ in range(total):
+                invalidate_model(user, Meal)
+                start = time.perf_counter()
+                client.get(url)
+                seconds += time.perf_counter() - start
+            self.write_result('cold', total, seconds)
+
+            response = client.get(url)
+            if response.status_code != 200:
+                self.stderr.write('list request failed with {}'.format(response.status_code))
+            start = time.perf_counter()
+            for _ in range(total):
+                client.get(url)
+            self.write_result('cached', total, time.perf_counter() - start)
+            transaction.set_rollback(True)
+
+    def write_result(self, title, total, seconds):
+        self.stdout.write('{:<10} {} requests in {:.2f} s, {:.1f} ms/request'.format(
+            title, total, seconds, seconds * 1000 / total))
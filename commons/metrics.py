@@ -0,0 +1,269 @@
+import bisect
+import threading
+from urllib.parse import quote
+from .cache import get_cache
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REGISTRY = []
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        )
+        for name, value in labels
+    ) + '}'
+
+
+class Metric:
+    '''
+    Base of the metrics aggregated in the process, the values are kept by
+    label values behind a lock so recording them costs a dict lookup
+    '''
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def get_key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def get_labels(self, key, **extra):
+        return list(zip(self.labelnames, key)) + list(extra.items())
+
+    def reset(self):
+        with self.lock:
+            self.values.clear()
+
+    def get_values(self):
+        with self.lock:
+            return dict(self.values)
+
+    def samples(self):
+        for key, value in sorted(self.get_values().items()):
+            yield self.name, self.get_labels(key), value
+
+    def render(self):
+        lines = [
+            '# HELP {} {}'.format(self.name, self.documentation),
+            '# TYPE {} {}'.format(self.name, self.type),
+        ]
+        for name, labels, value in self.samples():
+            lines.append('{}{} {}'.format(name, format_labels(labels), format_value(value)))
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.get_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(self.get_key(labels), 0)
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self.get_key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.get_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def get(self, **labels):
+        '''
+        return the number of observations and their sum
+        '''
+        counts = self.values.get(self.get_key(labels))
+        if counts is None:
+            return 0, 0.0
+        return sum(counts[:-1]), counts[-1]
+
+    def get_values(self):
+        with self.lock:
+            return {key: list(counts) for key, counts in self.values.items()}
+
+    def samples(self):
+        bounds = self.buckets + (float('inf'),)
+        for key, counts in sorted(self.get_values().items()):
+            total = 0
+            for bound, count in zip(bounds, counts):
+                total += count
+                yield self.name + '_bucket', self.get_labels(key, le=format_value(bound)), total
+            yield self.name + '_count', self.get_labels(key), total
+            yield self.name + '_sum', self.get_labels(key), counts[-1]
+
+
+class SharedMetric(Metric):
+    '''
+    Metric kept in the commons cache instead of the process, so the values
+    recorded by the celery workers are rendered by the /metrics of the web
+    processes. It needs a cache shared between processes like redis
+    '''
+
+    def get_cache_key(self, *parts):
+        return 'metrics:{}:{}'.format(self.name, ':'.join(quote(str(part)) for part in parts))
+
+    def add(self, cache_key, amount):
+        cache = get_cache()
+        cache.add(cache_key, 0, None)
+        try:
+            cache.incr(cache_key, amount)
+        except ValueError:
+            cache.set(cache_key, amount, None)
+
+    def remember(self, key):
+        '''
+        keep the label values in the cache to know which keys to render.
+        Only the first writer of a label wins the add of its marker, it then
+        takes the next slot of the labels with an incr, so concurrent
+        workers never overwrite the labels of each other
+        '''
+        cache = get_cache()
+        if not cache.add(self.get_cache_key('label', *key), True, None):
+            return
+        count_key = self.get_cache_key('labels')
+        cache.add(count_key, 0, None)
+        try:
+            index = cache.incr(count_key)
+        except ValueError:
+            cache.add(count_key, 1, None)
+            index = cache.get(count_key)
+        cache.set(self.get_cache_key('labels', index), key, None)
+
+    def get_slot_keys(self):
+        count = get_cache().get(self.get_cache_key('labels'), 0)
+        return [self.get_cache_key('labels', index) for index in range(1, count + 1)]
+
+    def get_keys(self):
+        return sorted({tuple(key) for key in get_cache().get_many(self.get_slot_keys()).values()})
+
+    def reset(self):
+        cache = get_cache()
+        keys = self.get_keys()
+        cache.delete_many(
+            [self.get_cache_key(*key) for key in keys]
+            + [self.get_cache_key('label', *key) for key in keys]
+            + self.get_slot_keys()
+        )
+        cache.delete(self.get_cache_key('labels'))
+
+
+class SharedCounter(SharedMetric, Counter):
+
+    def inc(self, amount=1, **labels):
+        key = self.get_key(labels)
+        self.remember(key)
+        self.add(self.get_cache_key(*key), amount)
+
+    def get(self, **labels):
+        return get_cache().get(self.get_cache_key(*self.get_key(labels)), 0)
+
+    def get_values(self):
+        keys = self.get_keys()
+        values = get_cache().get_many([self.get_cache_key(*key) for key in keys])
+        return {key: values.get(self.get_cache_key(*key), 0) for key in keys}
+
+
+class SharedHistogram(SharedMetric, Histogram):
+    '''
+    The sum is kept in microseconds, the cache only increments integers
+    '''
+
+    def get_bucket_keys(self, key):
+        return [self.get_cache_key(*key, index) for index in range(len(self.buckets) + 1)]\
+            + [self.get_cache_key(*key, 'sum')]
+
+    def observe(self, value, **labels):
+        key = self.get_key(labels)
+        self.remember(key)
+        index = bisect.bisect_left(self.buckets, value)
+        self.add(self.get_cache_key(*key, index), 1)
+        self.add(self.get_cache_key(*key, 'sum'), int(round(value * 1000000)))
+
+    def get_counts(self, key):
+        cache_keys = self.get_bucket_keys(key)
+        values = get_cache().get_many(cache_keys)
+        counts = [values.get(cache_key, 0) for cache_key in cache_keys]
+        counts[-1] = counts[-1] / 1000000
+        return counts
+
+    def get(self, **labels):
+        counts = self.get_counts(self.get_key(labels))
+        return sum(counts[:-1]), counts[-1]
+
+    def get_values(self):
+        return {key: self.get_counts(key) for key in self.get_keys()}
+
+    def reset(self):
+        cache = get_cache()
+        for key in self.get_keys():
+            cache.delete_many(self.get_bucket_keys(key))
+        super(SharedHistogram, self).reset()
+
+
+def render_metrics():
+    '''
+    Render every registered metric in the prometheus text format
+    '''
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+def reset_metrics():
+    for metric in REGISTRY:
+        metric.reset()
+
+
+REQUEST_LATENCY = Histogram(
+    'nora_http_request_duration_seconds',
+    'Latency of the requests by route',
+    ('route', 'method'),
+)
+REQUESTS = Counter(
+    'nora_http_requests_total',
+    'Requests by route and status code',
+    ('route', 'method', 'status'),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'nora_http_requests_in_progress',
+    'Requests being served by the process',
+)
@@ -0,0 +1,89 @@
+import time
+import logging
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from .metrics import REQUEST_LATENCY, REQUESTS, REQUESTS_IN_PROGRESS
+
+logger = logging.getLogger(__name__)
+
+# Any other method is recorded as "other", so clients can not create label values
+METRICS_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+
+class QueryCounter:
+    '''
+    Database execute wrapper that counts the queries and the time spent
+    running them
+    '''
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class QueryBudgetMiddleware:
+    '''
+    Add the number of queries and the database time in milliseconds of the
+    request as the X-DB-Queries and X-DB-Time headers, and log the requests
+    that run more queries than settings.QUERY_BUDGET
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        response['X-DB-Queries'] = str(counter.count)
+        response['X-DB-Time'] = '{:.2f}'.format(counter.duration * 1000)
+        if counter.count > settings.QUERY_BUDGET:
+            logger.warning(
+                '%s %s ran %s queries (budget %s) in %.2fms',
+                request.method,
+                request.path,
+                counter.count,
+                settings.QUERY_BUDGET,
+                counter.duration * 1000,
+            )
+        return response
+
+
+class MetricsMiddleware:
+    '''
+    Record the latency and the status code of every request by the name of
+    the resolved url, and the requests in progress, see commons.metrics
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+        route = self.get_route(request)
+        method = request.method if request.method in METRICS_METHODS else 'other'
+        REQUEST_LATENCY.observe(time.perf_counter() - start, route=route, method=method)
+        REQUESTS.inc(route=route, method=method, status=response.status_code)
+        return response
+
+    def get_route(self, request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            return 'unmatched'
+        return resolver_match.view_name or resolver_match.route
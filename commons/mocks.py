@@ -1,7 +1,9 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch
 
 
-@patch('deliveries.celery.call_send_link_task')
+@patch('deliveries.tasks.call_send_link_task')
 def mock_call_send_link_task(*args, **keywargs):
     '''
     Mock for call function send link to slack in celery
@@ -9,3 +11,54 @@ def mock_call_send_link_task(*args, **keywargs):
     def call_function(link, delivery_id):
         return "{} {}".format(link, delivery_id)
     return call_function('', '')
+
+
+class SlackStubServer:
+    '''
+    Local http server answering like the slack webhooks. Every request is
+    stored in ``requests`` and answered with the next status of
+    ``responses``, or 200 when there are no more
+    '''
+    def __init__(self, responses=None):
+        self.responses = list(responses or [])
+        self.requests = []
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                stub.requests.append({
+                    'path': self.path,
+                    'body': body,
+                    'content_type': self.headers['Content-Type'],
+                    'client_port': self.client_address[1],
+                })
+                status, headers = stub.responses.pop(0) if stub.responses else (200, {})
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'ok')
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever,
+            kwargs={'poll_interval': 0.01},
+            daemon=True
+        )
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{}/'.format(self.server.server_port)
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
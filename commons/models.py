@@ -1,6 +1,25 @@
+import os
+import time
+import uuid
 from django.db import models
 
 
+def uuid7():
+    '''
+    Return a time ordered UUID (version 7): 48 bits of unix time in
+    milliseconds followed by random bits, so new rows are appended at the
+    end of the primary key index instead of a random position
+    '''
+    timestamp = int(time.time() * 1000) & ((1 << 48) - 1)
+    rand = int.from_bytes(os.urandom(10), 'big')
+    value = timestamp << 80
+    value |= 0x7 << 76
+    value |= (rand >> 68) << 64
+    value |= 0b10 << 62
+    value |= rand & ((1 << 62) - 1)
+    return uuid.UUID(int=value)
+
+
 class TimeStampedModel(models.Model):
 
     """
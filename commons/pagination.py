@@ -0,0 +1,21 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CommonCursorPagination(CursorPagination):
+    '''
+    Keyset pagination over the creation time, stable under inserts and
+    without OFFSET scans. The client can ask for a smaller or bigger page
+    with ``?page_size`` up to ``API_MAX_PAGE_SIZE``
+    '''
+    ordering = ('-created', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class SearchCursorPagination(CommonCursorPagination):
+    '''
+    Keyset pagination over the name, for the prefix searches of the pickers
+    '''
+    ordering = ('name', 'id')
+    page_size = 20
@@ -0,0 +1,59 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from .cache import get_owner_id, invalidate_model
+
+# Models with an owner whose versions are kept by owner, see commons.cache
+VERSIONED_MODELS = (
+    'tags.Tag',
+    'meals.Meal',
+    'plates.Plate',
+    'menus.Menu',
+    'distributions.Distribution',
+    'deliveries.Delivery',
+    'deliveries.DeliverySelection',
+)
+
+
+def invalidate_models(model, owners):
+    '''
+    Bump the version of the model for the owners. The versions are bumped
+    again after the commit, so a value computed while the transaction was
+    open is not kept
+    '''
+    owner_ids = {get_owner_id(owner) for owner in owners if owner is not None}
+
+    def bump():
+        for owner_id in owner_ids:
+            invalidate_model(owner_id, model)
+
+    bump()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def object_changed(sender, instance, **kwargs):
+    invalidate_models(sender, [instance.owner_id])
+
+
+def relation_changed(sender, instance, action, **kwargs):
+    '''
+    The rows of a many to many field belong to the model declaring it, also
+    when they are changed from the related side
+    '''
+    if action.startswith('post_'):
+        invalidate_models(sender._meta.auto_created, [instance.owner_id])
+
+
+def connect_version_signals():
+    for label in VERSIONED_MODELS:
+        model = apps.get_model(label)
+        uid = 'commons_versions_{}'.format(label)
+        post_save.connect(object_changed, sender=model, dispatch_uid=uid)
+        post_delete.connect(object_changed, sender=model, dispatch_uid=uid)
+        for field in model._meta.local_many_to_many:
+            m2m_changed.connect(
+                relation_changed,
+                sender=field.remote_field.through,
+                dispatch_uid='{}_{}'.format(uid, field.name)
+            )
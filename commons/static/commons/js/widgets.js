@@ -0,0 +1,70 @@
+/*
+ * Initialization of the widgets of commons/widgets.py. Every widget is
+ * found by its data-widget attribute and takes its materialize options
+ * from window.WIDGET_OPTIONS (/widgets/options.js), so the forms do not
+ * need a script per field.
+ */
+(function () {
+    'use strict';
+
+    var SEARCH_DELAY = 250;
+
+    function getOptions(element) {
+        return (window.WIDGET_OPTIONS || {})[element.getAttribute('data-widget')] || {};
+    }
+
+    function initDatePickers(root) {
+        root.querySelectorAll('[data-widget="datepicker"]').forEach(function (input) {
+            M.Datepicker.init(input, getOptions(input));
+        });
+    }
+
+    function initTimePickers(root) {
+        root.querySelectorAll('[data-widget="timepicker"]').forEach(function (input) {
+            M.Timepicker.init(input, getOptions(input));
+            $(input).on('change', function () {
+                $(this).val($(this).val() + ':00');
+            });
+        });
+    }
+
+    function addResults(select, results) {
+        var values = new Set(Array.from(select.options, function (option) {
+            return option.value;
+        }));
+        results.forEach(function (item) {
+            if (!values.has(String(item.id))) {
+                select.add(new Option(item.name, item.id));
+            }
+        });
+        M.FormSelect.init(select, {});
+    }
+
+    function initSearch(select) {
+        var search = document.getElementById(select.id + '_search');
+        var url = select.getAttribute('data-search-url');
+        var timer = null;
+        if (!search) {
+            return;
+        }
+        search.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                fetch(url + '?q=' + encodeURIComponent(search.value), {credentials: 'same-origin'})
+                    .then(function (response) { return response.json(); })
+                    .then(function (data) { addResults(select, data.results); });
+            }, SEARCH_DELAY);
+        });
+    }
+
+    function initSelects(root) {
+        M.FormSelect.init(root.querySelectorAll('select'), {});
+        root.querySelectorAll('select[data-search-url]').forEach(initSearch);
+    }
+
+    window.addEventListener('DOMContentLoaded', function () {
+        initDatePickers(document);
+        initTimePickers(document);
+        initSelects(document);
+    });
+})();
@@ -1,10 +1,19 @@
 
 
+import re
+import json
+import time
+import threading
+import datetime
+from unittest.mock import patch
+from django.db import connection
 from django.urls import reverse
+from django.test import TestCase
+from django.test.utils import override_settings, modify_settings, CaptureQueriesContext
 from django.test.client import Client
 from model_mommy import mommy
 from rest_framework import status
-from rest_framework.test import APIClient, APITestCase
+from rest_framework.test import APIClient, APITestCase, APIRequestFactory, force_authenticate
 
 from tags.models import Tag
 from meals.models import Meal
@@ -12,6 +21,22 @@ from users.models import User
 from menus.models import Menu
 from plates.models import Plate
 from distributions.models import Distribution
+from meals.forms import MealModelForm
+from plates.forms import PlateModelForm
+from deliveries.models import Delivery, DeliverySelection
+from tags.views import TagViewSet
+from meals.views import MealViewSet
+from plates.views import PlateViewSet
+from menus.views import MenuViewSet
+from distributions.views import DistributionViewSet
+from .db import check_connections_health
+from .library import send_slack_message
+from .mocks import SlackStubServer
+from .widgets import DatePickerInput, SelectMultiplePickerInput, WIDGET_OPTIONS
+from .metrics import Counter, Histogram, SharedCounter, REGISTRY, REQUESTS, REQUEST_LATENCY, reset_metrics
+from .cache import get_cache, get_or_compute, invalidate_namespace, make_key,\
+    get_cache_stats, reset_cache_stats, get_model_version, get_model_versions,\
+    make_models_key
 
 
 class APITestBaseCase(APITestCase):
@@ -144,6 +169,77 @@ class APITestBaseCase(APITestCase):
         return distribution_id
 
 
+class QueryCaptureMixin:
+    '''
+    Query counting helpers for the test cases of the views and endpoints
+    '''
+
+    def capture_queries(self, method, path, data=None, **extra):
+        '''
+        run the request and return the response and the queries done,
+        leaving out the session storage and the savepoints of the tests
+        '''
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(path, data, **extra)
+        return response, [
+            query['sql'] for query in context.captured_queries
+            if 'django_session' not in query['sql'] and 'SAVEPOINT' not in query['sql']
+        ]
+
+    def assertQueriesDoNotDependOnRows(self, path, create_rows, method='get', data=None):
+        '''
+        check the request runs the same queries after ``create_rows(1)``
+        and after ``create_rows(10)`` more rows
+        '''
+        create_rows(1)
+        response, few_rows_queries = self.capture_queries(method, path, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        create_rows(10)
+        response, many_rows_queries = self.capture_queries(method, path, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            len(many_rows_queries),
+            len(few_rows_queries),
+            '{} {} depends on the rows:\n{}'.format(method.upper(), path, '\n'.join(many_rows_queries))
+        )
+        return response
+
+
+class QueryBudgetMixin(QueryCaptureMixin):
+    '''
+    Query budgets for the endpoints of an APITestBaseCase. ``query_budgets``
+    maps a path, formatted with the test case as ``self``, to the maximum
+    number of queries of a GET done by the principal user after
+    ``create_query_budget_data``
+    '''
+    query_budgets = {}
+
+    def create_query_budget_data(self):
+        '''
+        create enough rows to make an N+1 query visible
+        '''
+
+    def assertQueryBudget(self, path, budget, method='get', data=None):
+        response, queries = self.capture_queries(method, path, data)
+        self.assertLess(response.status_code, 400)
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            '{} {} ran {} queries, the budget is {}:\n{}'.format(
+                method.upper(), path, len(queries), budget, '\n'.join(queries)
+            )
+        )
+        return response
+
+    def test_query_budgets(self):
+        self.create_query_budget_data()
+        self.client.force_authenticate(user=self.user)
+        for path, budget in self.query_budgets.items():
+            path = path.format(self=self)
+            with self.subTest(path=path):
+                self.assertQueryBudget(path, budget)
+
+
 class UserLoginMixin:
     password = 'password'
     user_permissions = []
@@ -181,3 +277,444 @@ class CSRFMixin:
     def get_form_token(self, url):
         self.client.get(url, follow=True)
         return self.client.cookies['csrftoken'].value
+
+
+class CommonCacheTest(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        reset_cache_stats()
+        self.calls = []
+
+    def compute(self):
+        self.calls.append(1)
+        return len(self.calls)
+
+    def test_get_or_compute_stores_value(self):
+        self.assertEqual(get_or_compute(1, 'meals', ['list'], self.compute), 1)
+        self.assertEqual(get_or_compute(1, 'meals', ['list'], self.compute), 1)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(get_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_keys_are_namespaced_by_owner(self):
+        self.assertNotEqual(make_key(1, 'meals', 'list'), make_key(2, 'meals', 'list'))
+        get_or_compute(1, 'meals', ['list'], self.compute)
+        self.assertEqual(get_or_compute(2, 'meals', ['list'], self.compute), 2)
+
+    def test_invalidate_namespace(self):
+        get_or_compute(1, 'meals', ['list'], self.compute)
+        get_or_compute(1, 'tags', ['list'], self.compute)
+        invalidate_namespace(1, 'meals')
+        self.assertEqual(get_or_compute(1, 'meals', ['list'], self.compute), 3)
+        self.assertEqual(get_or_compute(1, 'tags', ['list'], self.compute), 2)
+
+    def test_invalidate_increases_version(self):
+        old_key = make_key(1, 'meals', 'list')
+        version = invalidate_namespace(1, 'meals')
+        self.assertEqual(invalidate_namespace(1, 'meals'), version + 1)
+        self.assertNotEqual(make_key(1, 'meals', 'list'), old_key)
+
+
+class ModelVersionTest(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = mommy.make('users.User')
+        self.other = mommy.make('users.User')
+        self.calls = []
+
+    def compute(self):
+        self.calls.append(1)
+        return len(self.calls)
+
+    def assertBumps(self, model, action, owner=None):
+        owner = owner or self.user
+        version = get_model_version(owner, model)
+        action()
+        self.assertGreater(get_model_version(owner, model), version)
+
+    def test_save_and_delete_bump_the_model(self):
+        tag = mommy.make(Tag, owner=self.user)
+        self.assertBumps(Tag, tag.save)
+        self.assertBumps(Tag, tag.delete)
+
+    def test_versions_are_by_owner_and_model(self):
+        versions = get_model_versions(self.user, [Tag, Meal])
+        other_version = get_model_version(self.other, Tag)
+        mommy.make(Tag, owner=self.user)
+        self.assertGreater(get_model_version(self.user, Tag), versions[0])
+        self.assertEqual(get_model_version(self.user, Meal), versions[1])
+        self.assertEqual(get_model_version(self.other, Tag), other_version)
+
+    def test_relations_bump_the_declaring_model(self):
+        meal = mommy.make(Meal, owner=self.user)
+        tag = mommy.make(Tag, owner=self.user)
+        self.assertBumps(Meal, lambda: meal.tags.add(tag))
+        self.assertBumps(Meal, lambda: tag.meals.remove(meal))
+
+    def test_bulk_create_bumps_the_model(self):
+        self.client.force_login(self.user)
+        self.assertBumps(Tag, lambda: self.client.post(
+            '/api/tags/bulk/', json.dumps([{'name': 'tag'}]), content_type='application/json'))
+
+    def test_models_key_follows_versions(self):
+        key = make_models_key(self.user, 'menus', [Menu, Plate], 'page')
+        mommy.make(Tag, owner=self.user)
+        self.assertEqual(make_models_key(self.user, 'menus', [Menu, Plate], 'page'), key)
+        mommy.make(Plate, owner=self.user)
+        self.assertNotEqual(make_models_key(self.user, 'menus', [Menu, Plate], 'page'), key)
+
+    def test_get_or_compute_with_models(self):
+        get_or_compute(self.user, 'meals', ['list'], self.compute, models=[Meal, Tag])
+        self.assertEqual(get_or_compute(self.user, 'meals', ['list'], self.compute, models=[Meal, Tag]), 1)
+        mommy.make(Tag, owner=self.user)
+        self.assertEqual(get_or_compute(self.user, 'meals', ['list'], self.compute, models=[Meal, Tag]), 2)
+
+
+@modify_settings(MIDDLEWARE={'prepend': 'commons.middleware.QueryBudgetMiddleware'})
+class QueryBudgetMiddlewareTest(TestCase):
+
+    def setUp(self):
+        self.user = mommy.make('users.User')
+        mommy.make('tags.Tag', owner=self.user, _quantity=3)
+        self.client.force_login(self.user)
+
+    def test_queries_headers(self):
+        response = self.client.get('/api/tags/')
+        self.assertGreater(int(response['X-DB-Queries']), 0)
+        self.assertGreaterEqual(float(response['X-DB-Time']), 0)
+
+    @override_settings(QUERY_BUDGET=0)
+    def test_requests_over_budget_are_logged(self):
+        with self.assertLogs('commons.middleware', 'WARNING') as logs:
+            self.client.get('/api/tags/')
+        self.assertIn('GET /api/tags/', logs.output[0])
+
+    @override_settings(QUERY_BUDGET=100)
+    def test_requests_within_budget_are_not_logged(self):
+        with patch('commons.middleware.logger') as logger:
+            self.client.get('/api/tags/')
+        logger.warning.assert_not_called()
+
+
+class MetricsTest(TestCase):
+
+    def setUp(self):
+        reset_metrics()
+        self.user = mommy.make('users.User')
+        self.client.force_login(self.user)
+
+    def make_metric(self, Metric, *args, **kwargs):
+        metric = Metric(*args, **kwargs)
+        self.addCleanup(REGISTRY.remove, metric)
+        return metric
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.make_metric(Histogram, 'test_seconds', 'test', ('route',), buckets=(0.1, 1))
+        histogram.observe(0.05, route='a')
+        histogram.observe(0.1, route='a')
+        histogram.observe(3, route='a')
+        rendered = histogram.render()
+        self.assertIn('test_seconds_bucket{route="a",le="0.1"} 2', rendered)
+        self.assertIn('test_seconds_bucket{route="a",le="1.0"} 2', rendered)
+        self.assertIn('test_seconds_bucket{route="a",le="+Inf"} 3', rendered)
+        self.assertIn('test_seconds_count{route="a"} 3', rendered)
+        self.assertIn('test_seconds_sum{route="a"} 3.15', rendered)
+
+    def test_label_values_are_escaped(self):
+        counter = self.make_metric(Counter, 'test_total', 'test', ('name',))
+        counter.inc(name='a "b"')
+        self.assertIn('test_total{name="a \\"b\\""} 1.0', counter.render())
+
+    def test_shared_labels_of_concurrent_writers_are_kept(self):
+        get_cache().clear()
+        counter = self.make_metric(SharedCounter, 'test_shared_total', 'test', ('d',))
+        cache_class = type(get_cache())
+        slow_methods = {}
+        for name in ('get', 'add', 'set'):
+            def slow(cache, *args, method=getattr(cache_class, name), **kwargs):
+                time.sleep(0.002)
+                return method(cache, *args, **kwargs)
+            slow_methods[name] = slow
+        barrier = threading.Barrier(8)
+
+        def inc(index):
+            barrier.wait()
+            counter.inc(d=index)
+
+        with patch.multiple(cache_class, **slow_methods):
+            threads = [threading.Thread(target=inc, args=(index,)) for index in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(counter.get_values(), {(str(index),): 1 for index in range(8)})
+
+    def test_requests_are_recorded_by_route(self):
+        self.client.get('/api/tags/')
+        self.client.get('/api/tags/')
+        self.client.get('/does-not-exist/')
+        self.assertEqual(REQUESTS.get(route='tag-list', method='GET', status=200), 2)
+        self.assertEqual(REQUEST_LATENCY.get(route='tag-list', method='GET')[0], 2)
+        self.assertEqual(REQUESTS.get(route='unmatched', method='GET', status=404), 1)
+
+    def test_unknown_methods_share_one_label(self):
+        self.client.generic('FOO', '/api/tags/')
+        self.client.generic('BAR', '/api/tags/')
+        self.assertEqual(REQUESTS.get(route='tag-list', method='other', status=405), 2)
+
+    def test_metrics_endpoint(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(reverse('home'))
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        content = response.content.decode()
+        self.assertIn('# TYPE nora_http_request_duration_seconds histogram', content)
+        self.assertIn('nora_http_requests_total{route="home",method="GET",status="200"} 1.0', content)
+        self.assertIn('nora_http_requests_in_progress 1.0', content)
+
+    def test_metrics_endpoint_is_private(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_with_token(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer other').status_code, 403)
+
+
+class OwnerModelMultipleChoiceFieldTest(TestCase):
+
+    def setUp(self):
+        self.nora, self.other = mommy.make('users.User', _quantity=2)
+        self.tags = mommy.make('tags.Tag', owner=self.nora, _quantity=3)
+        self.other_tag = mommy.make('tags.Tag', owner=self.other)
+
+    def get_form(self, tags):
+        return MealModelForm(
+            data={'name': 'meal', 'tags': [tag.id for tag in tags]},
+            user=self.nora
+        )
+
+    def test_validation_runs_one_query(self):
+        form = self.get_form(self.tags)
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+        self.assertCountEqual(form.cleaned_data['tags'], self.tags)
+
+    def test_render_reuses_validated_objects(self):
+        form = self.get_form(self.tags[:2])
+        form.is_valid()
+        with self.assertNumQueries(0):
+            html = str(form['tags'])
+        self.assertIn('value="{}" selected'.format(self.tags[0].id), html)
+        self.assertNotIn('value="{}"'.format(self.tags[2].id), html)
+
+    def test_render_plate_meals_with_their_tags(self):
+        meals = mommy.make('meals.Meal', owner=self.nora, tags=self.tags, _quantity=2)
+        form = PlateModelForm(data={'name': 'plate', 'meals': [meal.id for meal in meals]}, user=self.nora)
+        with self.assertNumQueries(2):
+            self.assertTrue(form.is_valid())
+            str(form['meals'])
+
+    def test_objects_of_other_owner_are_invalid(self):
+        form = self.get_form([self.tags[0], self.other_tag])
+        self.assertFalse(form.is_valid())
+        self.assertIn('tags', form.errors)
+
+    def test_invalid_ids(self):
+        form = MealModelForm(data={'name': 'meal', 'tags': ['abc']}, user=self.nora)
+        self.assertFalse(form.is_valid())
+        self.assertIn('tags', form.errors)
+
+    def test_choices_are_evaluated_once(self):
+        field = MealModelForm(user=self.nora).fields['tags']
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(field.choices)), 3)
+            self.assertEqual(len(field.choices), 3)
+
+
+class WidgetsTest(TestCase):
+
+    def test_widgets_render_without_scripts(self):
+        html = DatePickerInput().render('date', None, attrs={'id': 'id_date'})
+        self.assertIn('data-widget="datepicker"', html)
+        self.assertNotIn('<script', html)
+        html = SelectMultiplePickerInput(choices=[(1, 'one')]).render('plates', [1], attrs={'id': 'id_plates'})
+        self.assertIn('data-widget="select-multiple"', html)
+        self.assertNotIn('<script', html)
+
+    def test_media_is_shared_by_the_widgets(self):
+        media = DatePickerInput().media + SelectMultiplePickerInput().media
+        self.assertEqual(str(media).count('<script'), 2)
+        self.assertIn('commons/js/widgets.js', str(media))
+        self.assertIn('src="{}"'.format(reverse('widget-options')), str(media))
+
+    def test_widget_options(self):
+        response = self.client.get(reverse('widget-options'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age', response['Cache-Control'])
+        options = response.content.decode().split('=', 1)[1].strip().rstrip(';')
+        self.assertEqual(json.loads(options), WIDGET_OPTIONS)
+
+
+class ConnectionHealthTest(TestCase):
+
+    def test_unusable_connection_is_closed(self):
+        connection.ensure_connection()
+        with patch.object(connection, 'in_atomic_block', False),\
+                patch.object(connection, 'is_usable', return_value=False),\
+                patch.object(connection, 'close') as close:
+            check_connections_health()
+        close.assert_called_once_with()
+
+    def test_usable_connection_is_kept(self):
+        connection.ensure_connection()
+        with patch.object(connection, 'in_atomic_block', False),\
+                patch.object(connection, 'is_usable', return_value=True),\
+                patch.object(connection, 'close') as close:
+            check_connections_health()
+        close.assert_not_called()
+
+
+class QueryPlanTest(TestCase):
+    '''
+    The hot queries of the lists, the API and the slack links must be
+    resolved with an index, without sequential scans or sorts of the table
+    '''
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, other = mommy.make('users.User', _quantity=2)
+        for owner in (cls.user, other):
+            mommy.make('tags.Tag', owner=owner, _quantity=5)
+            mommy.make('meals.Meal', owner=owner, _quantity=5)
+            mommy.make('plates.Plate', owner=owner, _quantity=5)
+            mommy.make('menus.Menu', owner=owner, _quantity=5)
+            mommy.make('distributions.Distribution', owner=owner, _quantity=2)
+            mommy.make(
+                'deliveries.DeliverySelection',
+                owner=owner,
+                delivery__owner=owner,
+                _quantity=5
+            )
+        cls.delivery = Delivery.objects.first()
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute('{} {}'.format(connection.ops.explain_query_prefix(), sql), params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset, sql=None, params=None):
+        table = queryset.model._meta.db_table
+        if sql is None:
+            sql, params = queryset.query.sql_with_params()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+                plan = self.explain(sql, params)
+                cursor.execute('SET enable_seqscan = on')
+            self.assertNotIn('Seq Scan on {}'.format(table), plan)
+            self.assertNotRegex(plan, r'(?m)^\s*Sort\b')
+        elif connection.vendor == 'sqlite':
+            plan = self.explain(sql, params)
+            self.assertNotRegex(plan, r'SCAN (TABLE )?{}\b(?! USING)'.format(re.escape(table)))
+            self.assertNotIn('TEMP B-TREE', plan)
+        else:
+            self.skipTest('Query plans are only checked on postgresql and sqlite')
+
+    def capture_page_query(self, viewset):
+        '''
+        the sql and params of the page read by the list of the viewset for
+        the user, as issued by the cursor pagination
+        '''
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=self.user)
+        table = viewset.queryset.model._meta.db_table
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            response = viewset.as_view({'get': 'list'})(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return next(
+            (sql, params) for sql, params in queries
+            if 'FROM "{}"'.format(table) in sql and 'ORDER BY' in sql and 'LIMIT' in sql
+        )
+
+    def test_owner_lists_use_index(self):
+        for model in (Tag, Meal, Plate, Menu, Distribution, DeliverySelection):
+            with self.subTest(model=model.__name__):
+                self.assertUsesIndex(model.objects.filter(owner=self.user))
+
+    def test_api_pagination_uses_index(self):
+        for viewset in (TagViewSet, MealViewSet, PlateViewSet, MenuViewSet, DistributionViewSet):
+            with self.subTest(viewset=viewset.__name__):
+                sql, params = self.capture_page_query(viewset)
+                self.assertIn('ORDER BY', sql)
+                self.assertUsesIndex(viewset.queryset, sql, params)
+
+    def test_delivery_selections_use_index(self):
+        self.assertUsesIndex(DeliverySelection.objects.filter(delivery=self.delivery))
+
+    def test_deliveries_by_date_use_index(self):
+        today = datetime.date.today()
+        self.assertUsesIndex(
+            Delivery.objects.filter(date=today, was_sending=False).order_by()
+        )
+        self.assertUsesIndex(
+            Delivery.objects.filter(distribution=self.delivery.distribution, date=today).order_by()
+        )
+
+
+@override_settings(SLACK_BACKOFF_FACTOR=0, SLACK_MAX_RETRIES=2)
+class SendSlackMessageTest(TestCase):
+    delivery_id = '02d9cf84-6ec9-4dca-bc2e-8eaee718927f'
+
+    def send(self, server):
+        with override_settings(SLACK_SERVICE_URL=server.url):
+            return send_slack_message('T000/B000/XXXX', self.delivery_id)
+
+    def test_message_is_sent_as_json(self):
+        with SlackStubServer() as server:
+            response = self.send(server)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(server.requests[0]['path'], '/T000/B000/XXXX')
+        self.assertEqual(server.requests[0]['content_type'], 'application/json')
+        body = json.loads(server.requests[0]['body'].decode())
+        self.assertIn(self.delivery_id, body['blocks'][0]['text']['text'])
+
+    def test_connection_is_reused(self):
+        with SlackStubServer() as server:
+            self.send(server)
+            self.send(server)
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(server.requests[0]['client_port'], server.requests[1]['client_port'])
+
+    def test_retry_on_rate_limit_and_errors(self):
+        responses = [(429, {'Retry-After': '0'}), (503, {})]
+        with SlackStubServer(responses) as server:
+            response = self.send(server)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_stop_retrying_after_max_retries(self):
+        responses = [(500, {}), (500, {}), (500, {}), (500, {})]
+        with SlackStubServer(responses) as server:
+            response = self.send(server)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        with SlackStubServer([(404, {})]) as server:
+            response = self.send(server)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(server.requests), 1)
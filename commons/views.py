@@ -1,10 +1,28 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
 from django.contrib.auth.decorators import login_required
-from django.http import Http404, HttpResponseRedirect
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.db.models.signals import post_save
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django.utils.decorators import method_decorator
-from django.views.generic import TemplateView
+from django.views.generic import TemplateView, View
 from django.views.generic.base import RedirectView
 from django.views.generic.edit import CreateView, UpdateView, SingleObjectMixin
 from django.views.generic.list import ListView
+from django.views.decorators.cache import cache_control
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.authentication import SessionAuthentication, BasicAuthentication
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from .cache import make_models_key
+from .library import bulk_create_with_ids, bulk_create_m2m_rows, delete_m2m_rows
+from .metrics import render_metrics
+from .pagination import SearchCursorPagination
+from .widgets import WIDGET_OPTIONS_JS
 
 
 @method_decorator(login_required, name='dispatch')
@@ -16,6 +34,35 @@ class HomeTemplateView(TemplateView):
         return kwargs
 
 
+class MetricsView(View):
+    '''
+    Metrics of the process in the prometheus text format, for staff users
+    and for the bearer token of METRICS_TOKEN
+    '''
+
+    def has_access(self, request):
+        if request.user.is_staff:
+            return True
+        token = settings.METRICS_TOKEN
+        return bool(token) and constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''),
+            'Bearer {}'.format(token)
+        )
+
+    def get(self, request, *args, **kwargs):
+        if not self.has_access(request):
+            raise PermissionDenied
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@cache_control(public=True, max_age=86400)
+def widget_options(request):
+    '''
+    Materialize options of the widgets, see commons.widgets
+    '''
+    return HttpResponse(WIDGET_OPTIONS_JS, content_type='application/javascript')
+
+
 class ThanksTemplateView(TemplateView):
     template_name = "deliveries/thanks.html"
 
@@ -24,7 +71,23 @@ class SadnessTemplateView(TemplateView):
     template_name = "deliveries/sadness.html"
 
 
-class CommonMixinListView(ListView):
+class RelatedQuerysetMixin:
+    '''
+    Declares the relations read while rendering each object so they are
+    loaded with the page instead of once per row
+    '''
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    def apply_related(self, queryset):
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*self.prefetch_related_fields)
+        return queryset
+
+
+class CommonMixinListView(RelatedQuerysetMixin, ListView):
     template = 'crud/list.html'
     paginate_by = 100
 
@@ -33,14 +96,238 @@ class CommonMixinListView(ListView):
         context['create_url'] = self.create_url if hasattr(self, 'create_url') else ''
         context['update_url'] = self.update_url if hasattr(self, 'update_url') else ''
         context['delete_url'] = self.delete_url if hasattr(self, 'delete_url') else ''
+        context['list_cache_key'] = self.get_list_cache_key(context)
+        context['list_cache_timeout'] = settings.CRUD_LIST_CACHE_TIMEOUT
         return context
 
+    def get_list_cache_models(self):
+        '''
+        The model and the models of the relations read while rendering the
+        rows
+        '''
+        models = [self.model]
+        for path in self.select_related_fields + self.prefetch_related_fields:
+            model = self.model
+            for name in path.split('__'):
+                model = model._meta.get_field(name).related_model
+            models.append(model)
+        return models
+
+    def get_list_cache_key(self, context):
+        '''
+        Key of the rendered rows, it changes when any object shown by the
+        rows of the owner changes
+        '''
+        page = context['page_obj'].number if context['is_paginated'] else 1
+        return make_models_key(
+            self.request.user,
+            'list:{}'.format(self.model._meta.label),
+            self.get_list_cache_models(),
+            page
+        )
+
     def get_template_names(self):
         return self.template
 
     def get_queryset(self):
         queryset = super(CommonMixinListView, self).get_queryset()
-        return queryset.filter(owner=self.request.user)
+        return self.apply_related(queryset.filter(owner=self.request.user))
+
+
+class CommonMixinViewSet(RelatedQuerysetMixin, viewsets.ModelViewSet):
+    '''
+    Base viewset scoped to the objects of the request user, loading the
+    relations declared by the serializer in a constant number of queries
+    '''
+    authentication_classes = (SessionAuthentication, BasicAuthentication)
+    permission_classes = (IsAuthenticated, IsAuthenticatedOrReadOnly)
+    select_related_fields = ('owner',)
+
+    def get_queryset(self):
+        queryset = super(CommonMixinViewSet, self).get_queryset()
+        return self.apply_related(queryset.filter(owner=self.request.user))
+
+
+class BulkCreateMixin:
+    '''
+    Adds ``POST <list url>/bulk/`` receiving a list of objects, and ``PUT``
+    and ``PATCH`` receiving a list of objects with their ``id``. The ids of
+    the objects and of ``bulk_related_field`` are checked against the owner
+    in one query each, the objects are inserted or updated in bulk and
+    their many to many rows replaced in bulk inside one transaction
+    '''
+    bulk_related_field = None
+
+    def get_bulk_related_ids(self, items, partial=False):
+        '''
+        ids of ``bulk_related_field`` of every item, None for the items of a
+        partial update that leave the relation as it is
+        '''
+        if not self.bulk_related_field:
+            return [None for _ in items]
+        related_ids = []
+        for item in items:
+            if partial and self.bulk_related_field not in item:
+                related_ids.append(None)
+                continue
+            ids = item.get(self.bulk_related_field) or []
+            if not isinstance(ids, list) or not all(str(pk).isdigit() for pk in ids):
+                raise ValueError(ids)
+            related_ids.append([int(pk) for pk in ids])
+        return related_ids
+
+    def get_invalid_related_ids(self, related_ids):
+        requested = {pk for ids in related_ids if ids for pk in ids}
+        if not requested:
+            return []
+        related_model = self.queryset.model._meta\
+            .get_field(self.bulk_related_field).related_model
+        owned = set(
+            related_model.objects
+            .filter(owner=self.request.user, id__in=requested)
+            .values_list('id', flat=True)
+        )
+        return sorted(requested - owned)
+
+    def get_bulk_ids(self, items):
+        ids = [item.get('id') for item in items]
+        if not all(isinstance(pk, int) for pk in ids) or len(set(ids)) != len(ids):
+            raise ValueError(ids)
+        return ids
+
+    def create_objects(self, serializer):
+        model = self.queryset.model
+        return bulk_create_with_ids(model, [
+            model(owner=self.request.user, **data)
+            for data in serializer.validated_data
+        ])
+
+    def update_objects(self, objects, serializer):
+        '''
+        Write the validated fields with one bulk update. It sends no signals,
+        so post_save is sent for every object as save() would
+        '''
+        model = self.queryset.model
+        fields = {'modified'}
+        modified = timezone.now()
+        for instance, data in zip(objects, serializer.validated_data):
+            for name, value in data.items():
+                setattr(instance, name, value)
+                fields.add(name)
+            instance.modified = modified
+        model.objects.bulk_update(objects, sorted(fields))
+        for instance in objects:
+            post_save.send(
+                sender=model,
+                instance=instance,
+                created=False,
+                update_fields=frozenset(fields),
+                raw=False,
+                using=instance._state.db
+            )
+
+    def create_related_rows(self, objects, related_ids):
+        bulk_create_m2m_rows(self.queryset.model, self.bulk_related_field, [
+            (instance.pk, pk)
+            for instance, ids in zip(objects, related_ids)
+            for pk in ids or []
+        ])
+
+    def replace_related_rows(self, objects, related_ids):
+        replaced = [(instance, ids) for instance, ids in zip(objects, related_ids) if ids is not None]
+        if not replaced:
+            return
+        delete_m2m_rows(
+            self.queryset.model,
+            self.bulk_related_field,
+            [instance.pk for instance, ids in replaced]
+        )
+        self.create_related_rows(*zip(*replaced))
+
+    def validate_bulk(self, request, partial=False):
+        '''
+        Return the serializer and the related ids of the items, or the
+        response of the first error found
+        '''
+        if not isinstance(request.data, list) or not all(isinstance(item, dict) for item in request.data):
+            return None, None, Response(
+                {'detail': 'Expected a list of objects.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = self.get_serializer(data=request.data, many=True, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        try:
+            related_ids = self.get_bulk_related_ids(request.data, partial)
+        except ValueError:
+            return None, None, Response(
+                {self.bulk_related_field: 'Expected a list of ids.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        invalid_ids = self.get_invalid_related_ids(related_ids)
+        if invalid_ids:
+            return None, None, Response(
+                {self.bulk_related_field: 'Invalid ids {}.'.format(invalid_ids)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return serializer, related_ids, None
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer, related_ids, error = self.validate_bulk(request)
+        if error:
+            return error
+        with transaction.atomic():
+            objects = self.create_objects(serializer)
+            if self.bulk_related_field:
+                self.create_related_rows(objects, related_ids)
+                prefetch_related_objects(objects, self.bulk_related_field)
+        return Response(
+            self.get_serializer(objects, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @bulk.mapping.put
+    def bulk_update(self, request, partial=False):
+        serializer, related_ids, error = self.validate_bulk(request, partial)
+        if error:
+            return error
+        try:
+            ids = self.get_bulk_ids(request.data)
+        except ValueError:
+            return Response({'id': 'Expected a distinct id for every object.'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            objects = self.get_queryset().select_for_update(of=('self',)).in_bulk(ids)
+            missing_ids = sorted(set(ids) - set(objects))
+            if missing_ids:
+                return Response({'id': 'Invalid ids {}.'.format(missing_ids)}, status=status.HTTP_400_BAD_REQUEST)
+            objects = [objects[pk] for pk in ids]
+            self.update_objects(objects, serializer)
+            if self.bulk_related_field:
+                self.replace_related_rows(objects, related_ids)
+        objects = self.get_queryset().in_bulk(ids)
+        return Response(self.get_serializer([objects[pk] for pk in ids], many=True).data)
+
+    @bulk.mapping.patch
+    def bulk_partial_update(self, request):
+        return self.bulk_update(request, partial=True)
+
+
+class SearchMixin:
+    '''
+    Paginated search of the objects of the user whose name starts with
+    ``?q``, answering only ids and names. It feeds the remote mode of
+    SelectMultiplePickerInput
+    '''
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        queryset = self.queryset.model.objects.filter(owner=request.user)
+        prefix = request.query_params.get('q', '').strip()
+        if prefix:
+            queryset = queryset.filter(name__istartswith=prefix)
+        paginator = SearchCursorPagination()
+        page = paginator.paginate_queryset(queryset.values('id', 'name'), request, view=self)
+        return paginator.get_paginated_response(page)
 
 
 class CommonMixinCreateView(CreateView):
@@ -1,82 +1,99 @@
 import json
-from django.utils.safestring import mark_safe
 from django.forms import DateInput, TimeInput, SelectMultiple
-from .library import get_index_value
+from django.urls import reverse_lazy
+from django.utils.html import format_html
 from .constants import WIDGET_DATE_FORMAT, DATE_i18n, WIDGET_TIME_FORMAT
 
+WIDGETS_JS = 'commons/js/widgets.js'
+WIDGET_OPTIONS_URL = reverse_lazy('widget-options')
+
+WIDGET_OPTIONS = {
+    'datepicker': {
+        'format': WIDGET_DATE_FORMAT,
+        'i18n': DATE_i18n,
+        'autoClose': True
+    },
+    'timepicker': {
+        'format': WIDGET_TIME_FORMAT,
+        'i18n': DATE_i18n,
+        'twelveHour': False,
+        'autoClose': True
+    },
+}
+WIDGET_OPTIONS_JS = 'window.WIDGET_OPTIONS = {};\n'.format(json.dumps(WIDGET_OPTIONS))
+
+
+class PickerMixin:
+    '''
+    The pickers are initialized by commons/js/widgets.js from their
+    data-widget attribute, with the materialize options of WIDGET_OPTIONS
+    serialized once at import and served at WIDGET_OPTIONS_URL
+    '''
+    widget_name = None
+
+    class Media:
+        js = (WIDGET_OPTIONS_URL, WIDGETS_JS)
+
+    def __init__(self, attrs=None, *args, **kwargs):
+        picker_attrs = {'data-widget': self.widget_name}
+        picker_attrs.update(attrs or {})
+        super(PickerMixin, self).__init__(picker_attrs, *args, **kwargs)
+
+
+class DatePickerInput(PickerMixin, DateInput):
+    widget_name = 'datepicker'
+
+
+class TimePickerInput(PickerMixin, TimeInput):
+    widget_name = 'timepicker'
+
+
+class SelectMultiplePickerInput(PickerMixin, SelectMultiple):
+    '''
+    Materialize multiple select. With ``search_url`` the options are not
+    rendered, only the selected ones, and the rest are searched by name
+    prefix on the json endpoint (see commons.views.SearchMixin) while the
+    user types
+    '''
+    widget_name = 'select-multiple'
+
+    def __init__(self, attrs=None, choices=(), search_url=None):
+        super(SelectMultiplePickerInput, self).__init__(attrs, choices)
+        self.search_url = search_url
+
+    def get_selected_choices(self, value):
+        ids = [elem for elem in value if elem]
+        if not ids or not hasattr(self.choices, 'queryset'):
+            return []
+        field = self.choices.field
+        if hasattr(field, 'get_selected_objects'):
+            objects = field.get_selected_objects(ids)
+        else:
+            objects = self.choices.queryset.filter(pk__in=ids)
+        return [(field.prepare_value(instance), field.label_from_instance(instance)) for instance in objects]
+
+    def optgroups(self, name, value, attrs=None):
+        if self.search_url is None:
+            return super(SelectMultiplePickerInput, self).optgroups(name, value, attrs)
+        choices = self.choices
+        self.choices = self.get_selected_choices(value)
+        try:
+            return super(SelectMultiplePickerInput, self).optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+    def get_context(self, name, value, attrs):
+        context = super(SelectMultiplePickerInput, self).get_context(name, value, attrs)
+        if self.search_url is not None:
+            context['widget']['attrs']['data-search-url'] = str(self.search_url)
+        return context
 
-class DatePickerInput(DateInput):
-    def render(self, name, value, attrs=None, renderer=None):
-        unsafe_html = super(DatePickerInput, self)\
-            .render(name, value, attrs=attrs, renderer=None)
-        options = json.dumps({
-            'format': WIDGET_DATE_FORMAT,
-            'i18n': DATE_i18n,
-            'autoClose': True
-        })
-        js = '''<script type="text/javascript">
-        <!--//
-            window.addEventListener('DOMContentLoaded', function (event)  {
-                 M.Datepicker.init(
-                    document.getElementById("%(date_id)s"), %(options)s
-                );
-            });
-        //-->
-        </script>
-        ''' % {'date_id': attrs['id'], 'options': options}
-        return mark_safe(unsafe_html + js)
-
-
-class TimePickerInput(TimeInput):
-    def render(self, name, value, attrs=None, renderer=None):
-        unsafe_html = super(TimePickerInput, self)\
-            .render(name, value, attrs=attrs, renderer=None)
-        options = json.dumps({
-            'format': WIDGET_TIME_FORMAT,
-            'i18n': DATE_i18n,
-            'twelveHour': False,
-            'autoClose': True
-        })
-
-        js = '''<script type="text/javascript">
-        <!--//
-            window.addEventListener('DOMContentLoaded', function (event)  {
-                M.Timepicker.init(
-                    document.getElementById("%(date_id)s"), %(options)s
-                );
-                $("#%(date_id)s").on('change', function() {
-                    let receivedVal = $(this).val();
-                    $(this).val(receivedVal + ":00");
-                });
-            });
-        //-->
-        </script>
-        ''' % {'date_id': attrs['id'], 'options': options}
-        return mark_safe(unsafe_html + js)
-
-
-class SelectMultiplePickerInput(SelectMultiple):
     def render(self, name, value, attrs=None, renderer=None):
-        unsafe_html = super(SelectMultiplePickerInput, self)\
-            .render(name, value, attrs=attrs, renderer=None)
-
-        options = json.dumps({})
-        values = ','.join(
-            *[map(lambda elem: get_index_value(elem), value)]) if value else ''
-        js = '''<script type="text/javascript">
-        <!--//
-            window.addEventListener('DOMContentLoaded', function (event)  {
-                var elems = document.querySelectorAll('select');
-                M.FormSelect.init(elems,  %(options)s);
-                options = Array.from(document.querySelectorAll('#%(date_id)s option'));
-                var values = '%(values)s';
-                values.split(',').forEach(function(v) {
-                  options.find(c => c.value == v).selected = true;
-                });
-                M.FormSelect.init(elems,  %(options)s);
-            });
-
-        //-->
-        </script>
-        ''' % {'date_id': attrs['id'], 'options': options, 'values': values}
-        return mark_safe(unsafe_html + js)
+        html = super(SelectMultiplePickerInput, self).render(name, value, attrs=attrs, renderer=renderer)
+        if self.search_url is None:
+            return html
+        return format_html(
+            '<input type="text" id="{}_search" placeholder="Buscar" autocomplete="off">{}',
+            (attrs or {}).get('id', 'id_{}'.format(name)),
+            html
+        )
@@ -1 +0,0 @@
-from .celery import app as celery_app
\ No newline at end of file
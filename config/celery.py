@@ -10,6 +10,8 @@ app = Celery('nora')
 # Using a string here means the worker will not have to
 # pickle the object when using Windows.
 app.config_from_object('django.conf:settings')
+# The tasks.py modules of the apps are imported when the worker starts, the
+# web processes import this module the first time they enqueue a task
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
 
@@ -28,9 +28,9 @@ ENV.read_env(os.path.join(BASE_DIR, '.env'))
 SECRET_KEY = ENV('SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = ENV('DEBUG')
+DEBUG = ENV.bool('DEBUG', default=False)
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = ENV.list('ALLOWED_HOSTS', default=['localhost', '127.0.0.1', '[::1]'])
 
 BASE_URL = ENV('BASE_URL')
 # Application definition
@@ -54,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'commons.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,6 +64,16 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Development aid: report the queries of every request in the X-DB-Queries
+# and X-DB-Time headers and log the ones over QUERY_BUDGET
+QUERY_BUDGET = ENV.int('QUERY_BUDGET', default=20)
+if ENV.bool('QUERY_BUDGET_MIDDLEWARE', default=False):
+    MIDDLEWARE.insert(1, 'commons.middleware.QueryBudgetMiddleware')
+
+# /metrics is served to staff users and to scrapers sending
+# "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = ENV('METRICS_TOKEN', default='')
+
 
 REST_FRAMEWORK = {
     # Use Django's standard `django.contrib.auth` permissions,
@@ -76,28 +87,38 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ),
-
+    'DEFAULT_PAGINATION_CLASS': 'commons.pagination.CommonCursorPagination',
+    'PAGE_SIZE': ENV.int('API_PAGE_SIZE', default=100),
 }
 
+API_MAX_PAGE_SIZE = ENV.int('API_MAX_PAGE_SIZE', default=500)
+
 # Authentication Settings
 AUTH_USER_MODEL = 'users.User'
 
 ROOT_URLCONF = 'config.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [
             os.path.join(BASE_DIR, 'templates'),
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-            ]
+            ],
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
         },
     },
 ]
@@ -108,12 +129,31 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# DATABASE_POOLER_URL routes the connections through a local pooler like
+# pgbouncer, server side cursors are not available in transaction pooling
+DATABASE_POOLER_URL = ENV('DATABASE_POOLER_URL', default='')
+
 DATABASES = {
-    'default': ENV.db()
+    'default': ENV.db('DATABASE_POOLER_URL') if DATABASE_POOLER_URL else ENV.db()
 }
+if DATABASE_POOLER_URL:
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+DATABASES['default']['CONN_MAX_AGE'] = ENV.int('CONN_MAX_AGE', default=60)
 DATABASES['default']['TEST'] = {
     'NAME': 'nora_test'
 }
+DATABASE_HEALTH_CHECKS = ENV.bool('DATABASE_HEALTH_CHECKS', default=True)
+
+# Cache
+# locmemcache:// keeps the cache in the process, rediscache://<HOST>:<PORT>/<DB>
+# shares it between processes through Redis
+
+CACHES = {
+    'default': ENV.cache('CACHE_URL', default='locmemcache://nora')
+}
+CACHES['default']['KEY_PREFIX'] = 'nora'
+CACHES['default']['TIMEOUT'] = ENV.int('CACHE_TIMEOUT', default=300)
+COMMONS_CACHE_ALIAS = 'default'
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -161,6 +201,19 @@ DATE_FORMAT = '%d/%m/%Y'
 TIME_FORMAT = '%H:%M:%S'
 
 SLACK_SERVICE_URL = 'https://hooks.slack.com/services/'
+SLACK_CONNECT_TIMEOUT = 3.05
+SLACK_READ_TIMEOUT = 10
+SLACK_MAX_RETRIES = 3
+SLACK_BACKOFF_FACTOR = 0.5
+SLACK_MAX_RETRY_DELAY = 30
+SLACK_POOL_MAXSIZE = 10
+SLACK_FANOUT_WORKERS = 10
+SLACK_LINK_RETRIES = 3
+SLACK_LINK_RETRY_DELAY = 60
+
+DELIVERY_SELECTION_CACHE_TIMEOUT = ENV.int(
+    'DELIVERY_SELECTION_CACHE_TIMEOUT', default=60 * 60 * 24)
+CRUD_LIST_CACHE_TIMEOUT = ENV.int('CRUD_LIST_CACHE_TIMEOUT', default=60 * 60 * 24)
 
 
 # CELERY COMFIGURATION
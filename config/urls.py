@@ -3,7 +3,8 @@ from django.urls import path
 from django.views.generic.base import RedirectView
 from rest_framework_jwt.views import refresh_jwt_token, obtain_jwt_token
 
-from commons.views import HomeTemplateView, SadnessTemplateView, ThanksTemplateView
+from commons.views import HomeTemplateView, SadnessTemplateView, ThanksTemplateView, MetricsView,\
+    widget_options
 from users.views import LogoutView, LoginFormView
 from .api_urls import Router
 
@@ -19,6 +20,8 @@ urlpatterns = [
     path('thanks/', ThanksTemplateView.as_view(), name='thanks'),
     path('login/', LoginFormView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('widgets/options.js', widget_options, name='widget-options'),
     path('tags/', include('tags.urls')),
     path('meals/', include('meals.urls')),
     path('plates/', include('plates.urls')),
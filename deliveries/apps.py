@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class DeliveriesConfig(AppConfig):
     name = 'deliveries'
+
+    def ready(self):
+        from . import signals, metrics  # noqa: F401
@@ -1,7 +1,6 @@
 from django.forms import Form, CharField, ModelMultipleChoiceField
 from plates.models import Plate
 from commons.widgets import SelectMultiplePickerInput
-from .models import Delivery
 
 
 class DeliverySelectionForm(Form):
@@ -20,9 +19,6 @@ class DeliverySelectionForm(Form):
     )
 
     def __init__(self, *args, **kwargs):
-        delivery_id = kwargs.pop('id', None)
+        delivery = kwargs.pop('delivery')
         super(DeliverySelectionForm, self).__init__(*args, **kwargs)
-        delivery = Delivery.objects.filter(
-            menu_delivery_id=delivery_id).select_related('menu').get()
-        plates = delivery.menu.plates.all()
-        self.fields['plates'].queryset = plates
+        self.fields['plates'].queryset = delivery.menu.plates.all()
@@ -0,0 +1,50 @@
+'''
+Metrics of the slack link tasks. They are recorded by the celery workers
+in the shared cache and rendered by the /metrics of the web processes
+'''
+from commons.metrics import SharedCounter, SharedHistogram
+
+SLACK_QUEUE_DELAY = SharedHistogram(
+    'nora_slack_task_queue_delay_seconds',
+    'Delay between the eta of the link task and the start of its work',
+    ('distribution',),
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+SLACK_REQUEST_LATENCY = SharedHistogram(
+    'nora_slack_request_duration_seconds',
+    'Latency of every request to slack, retries included',
+    ('distribution',),
+)
+SLACK_REQUESTS = SharedCounter(
+    'nora_slack_requests_total',
+    'Requests to slack by status code or error',
+    ('distribution', 'status'),
+)
+SLACK_RETRIES = SharedCounter(
+    'nora_slack_retries_total',
+    'Requests to slack that were retries of a failed one',
+    ('distribution',),
+)
+SLACK_FAILURES = SharedCounter(
+    'nora_slack_failures_total',
+    'Messages that were not delivered after the retries by status code or error',
+    ('distribution', 'status'),
+)
+
+
+def get_status(result):
+    status_code = getattr(result, 'status_code', None)
+    return str(status_code) if status_code is not None else result.__class__.__name__
+
+
+def get_attempt_recorder(distribution_id):
+    '''
+    Return the on_attempt callback of commons.library.post_slack_payload
+    recording the requests to slack of the distribution
+    '''
+    def record_attempt(attempt, result, duration):
+        SLACK_REQUEST_LATENCY.observe(duration, distribution=distribution_id)
+        SLACK_REQUESTS.inc(distribution=distribution_id, status=get_status(result))
+        if attempt:
+            SLACK_RETRIES.inc(distribution=distribution_id)
+    return record_attempt
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0008_auto_20190613_2226'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(fields=['date', 'was_sending'], name='deliveries__date_4f8fd3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(fields=['distribution', 'date'], name='deliveries__distrib_c656e8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deliveryselection',
+            index=models.Index(fields=['owner', 'name'], name='deliveries__owner_i_3c6f9a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deliveryselection',
+            index=models.Index(fields=['delivery', 'name'], name='deliveries__deliver_dfd51f_idx'),
+        ),
+    ]
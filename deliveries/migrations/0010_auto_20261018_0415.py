@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:15
+
+import commons.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0009_auto_20261018_0414'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='delivery',
+            options={'ordering': ('date', 'menu_delivery_id')},
+        ),
+        migrations.AlterField(
+            model_name='delivery',
+            name='menu_delivery_id',
+            field=models.UUIDField(default=commons.models.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
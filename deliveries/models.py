@@ -1,7 +1,7 @@
-import uuid
 import datetime
 from django.db import models
-from commons.models import TimeStampedModel
+from django.db.models import Count
+from commons.models import TimeStampedModel, uuid7
 from distributions.models import Distribution
 from menus.models import Menu
 from plates.models import Plate
@@ -25,7 +25,7 @@ class Delivery(TimeStampedModel):
     )
     menu_delivery_id = models.UUIDField(
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False
     )
     owner = models.ForeignKey(
@@ -35,7 +35,11 @@ class Delivery(TimeStampedModel):
     )
 
     class Meta:
-        ordering = ('menu_delivery_id',)
+        ordering = ('date', 'menu_delivery_id')
+        indexes = [
+            models.Index(fields=['date', 'was_sending']),
+            models.Index(fields=['distribution', 'date']),
+        ]
 
     def __str__(self):
         return ''
@@ -73,12 +77,39 @@ class DeliverySelection(TimeStampedModel):
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['owner', 'name']),
+            models.Index(fields=['delivery', 'name']),
+        ]
 
     def __str__(self):
-
         return "{} {} \t{} {}".format(
             self.delivery.date,
             self.name,
-            ','.join(self.plates.all().values_list('name', flat=True)),
+            ','.join(plate.name for plate in self.plates.all()),
             self.description
         )
+
+    @staticmethod
+    def get_plates_summary(owner, date):
+        '''
+        Number of commensals that chose every plate of every delivery of
+        the date, counted in one query over the plates of the selections
+        '''
+        return DeliverySelection.plates.through.objects\
+            .filter(
+                deliveryselection__owner=owner,
+                deliveryselection__delivery__date=date
+            )\
+            .values(
+                'deliveryselection__delivery_id',
+                'deliveryselection__delivery__menu__name',
+                'plate_id',
+                'plate__name'
+            )\
+            .annotate(total=Count('deliveryselection_id'))\
+            .order_by(
+                'deliveryselection__delivery__menu__name',
+                'deliveryselection__delivery_id',
+                'plate__name'
+            )
@@ -0,0 +1,126 @@
+'''
+Scheduling of the slack link tasks. Celery is only imported when a task is
+enqueued or revoked, so loading the models does not build the celery app
+'''
+import logging
+import uuid
+from datetime import datetime, timedelta
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def get_send_link_eta(date, hour):
+    '''
+    datetime for sending the links of a day and an hour of distribution
+    '''
+    delta = datetime(
+        year=date.year,
+        month=date.month,
+        day=date.day,
+        hour=hour.hour,
+        minute=hour.minute
+    )
+    return delta + timedelta(hours=4)
+
+
+def get_slot(date, hour):
+    return (date.isoformat(), hour.strftime('%H:%M'))
+
+
+def get_slot_key(slot):
+    return 'slack-slot:{}:{}'.format(*slot)
+
+
+def get_delivery_key(delivery):
+    return 'slack-delivery:{}'.format(delivery.menu_delivery_id)
+
+
+def schedule_distribution_links(date, hour):
+    '''
+    Enqueue the task sending every pending link of the time slot. The
+    deliveries of a slot share one task, so only the first menu saved for
+    a slot enqueues it while the slot is still in the future. The id of
+    the task is kept in the cache to revoke it when the slot is empty
+    '''
+    from .tasks import send_distribution_links_task
+
+    eta = get_send_link_eta(date, hour)
+    slot = get_slot(date, hour)
+    slot_key = get_slot_key(slot)
+    task_id = str(uuid.uuid4())
+    seconds_to_eta = int((eta - datetime.utcnow()).total_seconds())
+    if seconds_to_eta > 0 and not cache.add(slot_key, task_id, seconds_to_eta + 3600):
+        return False
+    try:
+        send_distribution_links_task.apply_async(args=slot, eta=eta, task_id=task_id)
+    except OSError:
+        cache.delete(slot_key)
+        logger.exception('Celery is down, the links of %s %s were not scheduled', *slot)
+        return False
+    return True
+
+
+def release_distribution_links(slot):
+    '''
+    Revoke the task of the time slot when it has no pending deliveries
+    '''
+    from config.celery import app
+    from .models import Delivery
+
+    hour = datetime.strptime(slot[1], '%H:%M').time()
+    has_pending = Delivery.objects.filter(
+        date=slot[0],
+        was_sending=False,
+        distribution__distribution_hour_link__hour=hour.hour,
+        distribution__distribution_hour_link__minute=hour.minute,
+    ).exists()
+    task_id = cache.get(get_slot_key(slot))
+    if has_pending or not task_id:
+        return False
+    try:
+        app.control.revoke(task_id)
+    except OSError:
+        logger.exception('Celery is down, the task of %s %s was not revoked', *slot)
+        return False
+    cache.delete(get_slot_key(slot))
+    return True
+
+
+def schedule_delivery_link(delivery):
+    '''
+    Schedule the link of the delivery, saving the same delivery again does
+    not enqueue another task and moving it to another time slot revokes
+    the task of the previous slot when nothing else is left there
+    '''
+    hour = delivery.distribution.distribution_hour_link
+    slot = get_slot(delivery.date, hour)
+    delivery_key = get_delivery_key(delivery)
+    previous_slot = cache.get(delivery_key)
+    schedule_distribution_links(delivery.date, hour)
+    eta = get_send_link_eta(delivery.date, hour)
+    cache.set(delivery_key, slot, max(int((eta - datetime.utcnow()).total_seconds()), 0) + 3600)
+    if previous_slot and tuple(previous_slot) != slot:
+        release_distribution_links(previous_slot)
+
+
+def schedule_deliveries_links(deliveries):
+    '''
+    Schedule the links of many new deliveries, enqueueing one task for
+    every distinct time slot of the deliveries
+    '''
+    slots = {}
+    delivery_keys = {}
+    for delivery in deliveries:
+        hour = delivery.distribution.distribution_hour_link
+        slot = get_slot(delivery.date, hour)
+        slots[slot] = (delivery.date, hour)
+        delivery_keys[get_delivery_key(delivery)] = slot
+    for date, hour in slots.values():
+        schedule_distribution_links(date, hour)
+    if slots:
+        last_eta = max(get_send_link_eta(date, hour) for date, hour in slots.values())
+        cache.set_many(
+            delivery_keys,
+            max(int((last_eta - datetime.utcnow()).total_seconds()), 0) + 3600
+        )
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from distributions.models import Distribution
+from menus.models import Menu
+from plates.models import Plate
+from .models import Delivery
+
+SELECTION_FRAGMENT_NAME = 'delivery_selection'
+
+
+def delete_selection_cache(delivery_ids):
+    '''
+    Remove the rendered selection form of the given deliveries
+    '''
+    cache.delete_many([
+        make_template_fragment_key(SELECTION_FRAGMENT_NAME, [delivery_id])
+        for delivery_id in delivery_ids
+    ])
+
+
+@receiver(post_save, sender=Delivery)
+@receiver(post_delete, sender=Delivery)
+def delivery_changed(sender, instance, **kwargs):
+    delete_selection_cache([instance.menu_delivery_id])
+
+
+@receiver(post_save, sender=Menu)
+def menu_changed(sender, instance, **kwargs):
+    delete_selection_cache(
+        instance.deliveries.values_list('menu_delivery_id', flat=True))
+
+
+@receiver(m2m_changed, sender=Menu.plates.through)
+def menu_plates_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    '''
+    From the plate side the rows are already gone after the change, so the
+    deliveries are found by the menus of pk_set, or collected before a clear
+    '''
+    if not reverse:
+        if action.startswith('post_'):
+            delete_selection_cache(
+                Delivery.objects.filter(menu=instance).values_list('menu_delivery_id', flat=True))
+    elif action == 'pre_clear':
+        instance._cleared_delivery_ids = list(
+            Delivery.objects.filter(menu__plates=instance).values_list('menu_delivery_id', flat=True))
+    elif action == 'post_clear':
+        delete_selection_cache(instance.__dict__.pop('_cleared_delivery_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        delete_selection_cache(
+            Delivery.objects.filter(menu_id__in=pk_set).values_list('menu_delivery_id', flat=True))
+
+
+@receiver(post_save, sender=Plate)
+def plate_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    delete_selection_cache(
+        Delivery.objects.filter(menu__plates=instance)
+        .values_list('menu_delivery_id', flat=True))
+
+
+@receiver(pre_delete, sender=Plate)
+def plate_deleted(sender, instance, **kwargs):
+    delete_selection_cache(
+        Delivery.objects.filter(menu__plates=instance)
+        .values_list('menu_delivery_id', flat=True))
+
+
+@receiver(post_save, sender=Distribution)
+def distribution_changed(sender, instance, **kwargs):
+    delete_selection_cache(
+        instance.deliveries.values_list('menu_delivery_id', flat=True))
@@ -0,0 +1,139 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from django.conf import settings
+from django.db import transaction
+from commons.library import send_slack_message, send_slack_menus
+from config.celery import app
+from .models import Delivery
+from .metrics import SLACK_QUEUE_DELAY, SLACK_FAILURES, get_attempt_recorder
+from .scheduling import get_send_link_eta
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(bind=True, name='deliveries.celery.call_send_link_task')
+def call_send_link_task(self, link, delivery_id):
+    distribution_id = Delivery.objects.filter(menu_delivery_id=delivery_id)\
+        .values_list('distribution_id', flat=True).first()
+    logger.info('Call send link task', extra={'delivery': delivery_id})
+    try:
+        response = send_slack_message(link, delivery_id, get_attempt_recorder(distribution_id))
+    except Exception as error:
+        SLACK_FAILURES.inc(distribution=distribution_id, status=error.__class__.__name__)
+        raise
+    if response.status_code == 200:
+        Delivery.objects.filter(menu_delivery_id=delivery_id).update(
+            was_sending=True,
+            hour_sent=datetime.now().time()
+        )
+    else:
+        SLACK_FAILURES.inc(distribution=distribution_id, status=response.status_code)
+    logger.info(
+        'finish send link task',
+        extra={'delivery': delivery_id, 'status': response.status_code}
+    )
+
+
+def send_link_group(link_id, deliveries):
+    distribution_id = deliveries[0].distribution_id
+    try:
+        response = send_slack_menus(
+            link_id,
+            [(delivery.menu_delivery_id, delivery.menu.name) for delivery in deliveries],
+            get_attempt_recorder(distribution_id)
+        )
+        status = response.status_code
+    except Exception as error:
+        status = error.__class__.__name__
+    if status != 200:
+        SLACK_FAILURES.inc(distribution=distribution_id, status=status)
+    return status
+
+
+def claim_deliveries(date, hour):
+    '''
+    Mark the pending deliveries of the time slot as sent in a short
+    transaction and return them by slack link, so no row stays locked
+    while slack is called and another worker does not pick them again
+    '''
+    with transaction.atomic():
+        deliveries = list(
+            Delivery.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('distribution', 'menu')
+            .filter(
+                date=date,
+                was_sending=False,
+                distribution__distribution_hour_link__hour=hour.hour,
+                distribution__distribution_hour_link__minute=hour.minute,
+            )
+        )
+        Delivery.objects\
+            .filter(menu_delivery_id__in=[delivery.menu_delivery_id for delivery in deliveries])\
+            .update(was_sending=True)
+    groups = {}
+    for delivery in deliveries:
+        groups.setdefault(delivery.distribution.link_id, []).append(delivery)
+    return groups
+
+
+@app.task(bind=True, name='deliveries.celery.send_distribution_links_task')
+def send_distribution_links_task(self, date, hour, attempt=0):
+    '''
+    Send the links of every pending delivery of the time slot, one message
+    per slack link, posting to the different links concurrently. The
+    deliveries of the links that failed are released and the slot is sent
+    again later, doubling the delay up to SLACK_LINK_RETRIES times
+    '''
+    slot = (date, hour)
+    hour = datetime.strptime(hour, '%H:%M').time()
+    results = {}
+    groups = claim_deliveries(date, hour)
+    if not groups:
+        return results
+
+    eta = get_send_link_eta(datetime.strptime(date, '%Y-%m-%d'), hour)
+    queue_delay = max((datetime.utcnow() - eta).total_seconds(), 0)
+    if not attempt:
+        for group in groups.values():
+            SLACK_QUEUE_DELAY.observe(queue_delay, distribution=group[0].distribution_id)
+    logger.info(
+        'Send distribution links',
+        extra={'slot': slot, 'links': len(groups), 'queue_delay': queue_delay, 'attempt': attempt}
+    )
+    workers = min(settings.SLACK_FANOUT_WORKERS, len(groups))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        statuses = dict(zip(
+            groups.keys(),
+            executor.map(lambda item: send_link_group(*item), groups.items())
+        ))
+
+    sent_ids = []
+    failed_ids = []
+    for link_id, group in groups.items():
+        for delivery in group:
+            results[str(delivery.menu_delivery_id)] = statuses[link_id]
+            if statuses[link_id] == 200:
+                sent_ids.append(delivery.menu_delivery_id)
+            else:
+                failed_ids.append(delivery.menu_delivery_id)
+    Delivery.objects.filter(menu_delivery_id__in=sent_ids).update(hour_sent=datetime.now().time())
+    Delivery.objects.filter(menu_delivery_id__in=failed_ids).update(was_sending=False)
+    if failed_ids:
+        retry_distribution_links(self, slot, attempt)
+    return results
+
+
+def retry_distribution_links(task, slot, attempt):
+    if attempt >= settings.SLACK_LINK_RETRIES:
+        logger.error('Links of %s %s not sent after %s attempts', slot[0], slot[1], attempt + 1)
+        return
+    try:
+        task.apply_async(
+            args=slot,
+            kwargs={'attempt': attempt + 1},
+            countdown=settings.SLACK_LINK_RETRY_DELAY * 2 ** attempt
+        )
+    except OSError:
+        logger.exception('Celery is down, the links of %s %s were not retried', *slot)
@@ -0,0 +1,276 @@
+from datetime import date, time, timedelta
+from unittest.mock import patch
+
+import requests
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from commons.tests import UserLoginMixin
+from commons.mocks import SlackStubServer
+from commons.metrics import render_metrics
+from config.celery import app
+from deliveries.tasks import send_distribution_links_task, call_send_link_task, claim_deliveries
+from deliveries.scheduling import schedule_distribution_links, schedule_delivery_link
+from deliveries.models import Delivery
+from deliveries.metrics import SLACK_QUEUE_DELAY, SLACK_REQUEST_LATENCY, SLACK_REQUESTS,\
+    SLACK_RETRIES, SLACK_FAILURES
+from distributions.models import Distribution
+from menus.models import Menu
+
+
+@override_settings(SLACK_BACKOFF_FACTOR=0, SLACK_MAX_RETRIES=0)
+class TestSendDistributionLinks(TestCase, UserLoginMixin):
+    '''
+    Tests for the links sent to slack for every distribution time slot
+    '''
+    def setUp(self):
+        cache.clear()
+        retry_patcher = patch.object(send_distribution_links_task, 'apply_async')
+        self.retry_links = retry_patcher.start()
+        self.addCleanup(retry_patcher.stop)
+        self.nora = self.create_user(username='nora', is_staff=True)
+        self.distribution_one = self.create_distribution('T000/B000/one', time(9))
+        self.distribution_two = self.create_distribution('T000/B000/two', time(9))
+        self.distribution_late = self.create_distribution('T000/B000/late', time(11))
+        self.deliveries = [
+            self.create_delivery('menu 1', self.distribution_one),
+            self.create_delivery('menu 2', self.distribution_one),
+            self.create_delivery('menu 3', self.distribution_two),
+        ]
+        self.late_delivery = self.create_delivery('menu 4', self.distribution_late)
+
+    def tearDown(self):
+        Delivery.objects.all().delete()
+        self.delete_all_user()
+
+    def create_distribution(self, link_id, hour):
+        return Distribution.objects.create(
+            name=link_id,
+            link_id=link_id,
+            is_active=True,
+            distribution_hour_link=hour,
+            end_available_distribution_link=time(12),
+            owner=self.nora,
+        )
+
+    def create_delivery(self, name, distribution):
+        menu = Menu.objects.create(owner=self.nora, name=name)
+        return Delivery.objects.create(
+            menu=menu,
+            distribution=distribution,
+            date=date.today(),
+            owner=self.nora,
+        )
+
+    def send_links(self, server, attempt=0):
+        with override_settings(SLACK_SERVICE_URL=server.url):
+            return send_distribution_links_task(date.today().isoformat(), '09:00', attempt)
+
+    def test_one_message_per_link(self):
+        with SlackStubServer() as server:
+            results = self.send_links(server)
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(
+            sorted(request['path'] for request in server.requests),
+            ['/T000/B000/one', '/T000/B000/two']
+        )
+        self.assertEqual(
+            results,
+            {str(delivery.menu_delivery_id): 200 for delivery in self.deliveries}
+        )
+        for delivery in self.deliveries:
+            delivery.refresh_from_db()
+            self.assertTrue(delivery.was_sending)
+            self.assertIsNotNone(delivery.hour_sent)
+        self.late_delivery.refresh_from_db()
+        self.assertFalse(self.late_delivery.was_sending)
+
+    def test_sent_deliveries_are_not_sent_again(self):
+        with SlackStubServer() as server:
+            self.send_links(server)
+            self.assertEqual(self.send_links(server), {})
+        self.assertEqual(len(server.requests), 2)
+
+    def test_failed_deliveries_stay_pending(self):
+        Delivery.objects.exclude(distribution=self.distribution_one).delete()
+        with SlackStubServer([(404, {})]) as server:
+            results = self.send_links(server)
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(set(results.values()), {404})
+        self.assertEqual(Delivery.objects.filter(was_sending=False).count(), 2)
+
+    @override_settings(SLACK_LINK_RETRIES=2, SLACK_LINK_RETRY_DELAY=10)
+    def test_failed_links_are_sent_again_with_backoff(self):
+        with SlackStubServer([(404, {})] * 4) as server:
+            self.send_links(server)
+            self.send_links(server, attempt=1)
+        self.assertEqual(
+            [(call[1]['kwargs'], call[1]['countdown']) for call in self.retry_links.call_args_list],
+            [({'attempt': 1}, 10), ({'attempt': 2}, 20)]
+        )
+        self.assertEqual(self.retry_links.call_args[1]['args'], (date.today().isoformat(), '09:00'))
+        with SlackStubServer([(404, {})] * 2) as server, self.assertLogs('deliveries.tasks', 'ERROR'):
+            self.send_links(server, attempt=2)
+        self.assertEqual(self.retry_links.call_count, 2)
+
+    def test_sent_links_are_not_retried(self):
+        with SlackStubServer() as server:
+            self.send_links(server)
+        self.retry_links.assert_not_called()
+
+    def test_claimed_deliveries_are_not_claimed_again(self):
+        groups = claim_deliveries(date.today().isoformat(), time(9))
+        self.assertEqual(
+            sorted(delivery.menu_delivery_id for group in groups.values() for delivery in group),
+            sorted(delivery.menu_delivery_id for delivery in self.deliveries)
+        )
+        self.assertEqual(Delivery.objects.filter(was_sending=True).count(), 3)
+        self.assertEqual(claim_deliveries(date.today().isoformat(), time(9)), {})
+
+    def test_metrics_by_distribution(self):
+        with SlackStubServer() as server:
+            self.send_links(server)
+        for distribution in (self.distribution_one, self.distribution_two):
+            self.assertEqual(SLACK_REQUESTS.get(distribution=distribution.id, status=200), 1)
+            self.assertEqual(SLACK_REQUEST_LATENCY.get(distribution=distribution.id)[0], 1)
+            self.assertEqual(SLACK_QUEUE_DELAY.get(distribution=distribution.id)[0], 1)
+        self.assertEqual(SLACK_QUEUE_DELAY.get(distribution=self.distribution_late.id)[0], 0)
+        self.assertIn(
+            'nora_slack_requests_total{{distribution="{}",status="200"}} 1.0'.format(self.distribution_one.id),
+            render_metrics()
+        )
+
+    @override_settings(SLACK_MAX_RETRIES=1)
+    def test_metrics_of_retries_and_failures(self):
+        Delivery.objects.exclude(distribution=self.distribution_one).delete()
+        with SlackStubServer([(503, {}), (503, {})]) as server:
+            self.send_links(server)
+        distribution_id = self.distribution_one.id
+        self.assertEqual(SLACK_REQUESTS.get(distribution=distribution_id, status=503), 2)
+        self.assertEqual(SLACK_RETRIES.get(distribution=distribution_id), 1)
+        self.assertEqual(SLACK_FAILURES.get(distribution=distribution_id, status=503), 1)
+
+
+class TestScheduleDistributionLinks(TestCase, UserLoginMixin):
+
+    def setUp(self):
+        cache.clear()
+        self.nora = self.create_user(username='nora', is_staff=True)
+        self.distribution = Distribution.objects.create(
+            name="test",
+            link_id="T000/B000/one",
+            is_active=True,
+            distribution_hour_link=time(9),
+            end_available_distribution_link=time(12),
+            owner=self.nora,
+        )
+        self.menu = Menu.objects.create(owner=self.nora, name="menu")
+        self.delivery = Delivery.objects.create(
+            menu=self.menu,
+            distribution=self.distribution,
+            date=date.today() + timedelta(days=1),
+            owner=self.nora,
+        )
+
+    def tearDown(self):
+        Delivery.objects.all().delete()
+        self.delete_all_user()
+
+    def test_one_task_per_time_slot(self):
+        tomorrow = date.today() + timedelta(days=1)
+        with patch.object(send_distribution_links_task, 'apply_async') as apply_async:
+            self.assertTrue(schedule_distribution_links(tomorrow, time(9)))
+            self.assertFalse(schedule_distribution_links(tomorrow, time(9)))
+            self.assertTrue(schedule_distribution_links(tomorrow, time(11)))
+        self.assertEqual(apply_async.call_count, 2)
+        self.assertEqual(apply_async.call_args_list[0][1]['args'], (tomorrow.isoformat(), '09:00'))
+
+    def test_broker_down_is_logged_and_frees_the_slot(self):
+        tomorrow = date.today() + timedelta(days=1)
+        with patch.object(send_distribution_links_task, 'apply_async', side_effect=OSError),\
+                self.assertLogs('deliveries.scheduling', 'ERROR') as logs:
+            self.assertFalse(schedule_distribution_links(tomorrow, time(9)))
+        self.assertIn('Celery is down', logs.output[0])
+        with patch.object(send_distribution_links_task, 'apply_async'):
+            self.assertTrue(schedule_distribution_links(tomorrow, time(9)))
+
+    def test_past_time_slots_are_always_sent(self):
+        yesterday = date.today() - timedelta(days=1)
+        with patch.object(send_distribution_links_task, 'apply_async') as apply_async:
+            schedule_distribution_links(yesterday, time(9))
+            schedule_distribution_links(yesterday, time(9))
+        self.assertEqual(apply_async.call_count, 2)
+
+    def test_saving_a_delivery_again_does_not_enqueue(self):
+        with patch.object(send_distribution_links_task, 'apply_async') as apply_async:
+            for _ in range(5):
+                schedule_delivery_link(self.delivery)
+        self.assertEqual(apply_async.call_count, 1)
+
+    def test_moving_a_delivery_revokes_the_empty_slot(self):
+        with patch.object(send_distribution_links_task, 'apply_async') as apply_async,\
+                patch.object(app, 'control') as control:
+            schedule_delivery_link(self.delivery)
+            first_task_id = apply_async.call_args[1]['task_id']
+            self.delivery.date = self.delivery.date + timedelta(days=1)
+            self.delivery.save()
+            schedule_delivery_link(self.delivery)
+        self.assertEqual(apply_async.call_count, 2)
+        self.assertNotEqual(apply_async.call_args[1]['task_id'], first_task_id)
+        control.revoke.assert_called_once_with(first_task_id)
+
+    def test_moving_a_delivery_keeps_the_slot_with_other_deliveries(self):
+        Delivery.objects.create(
+            menu=Menu.objects.create(owner=self.nora, name="other menu"),
+            distribution=self.distribution,
+            date=self.delivery.date,
+            owner=self.nora,
+        )
+        with patch.object(send_distribution_links_task, 'apply_async'),\
+                patch.object(app, 'control') as control:
+            schedule_delivery_link(self.delivery)
+            self.delivery.date = self.delivery.date + timedelta(days=1)
+            self.delivery.save()
+            schedule_delivery_link(self.delivery)
+        control.revoke.assert_not_called()
+
+
+class TestCallSendLinkTask(TestCase, UserLoginMixin):
+
+    def setUp(self):
+        cache.clear()
+        nora = self.create_user(username='nora', is_staff=True)
+        self.distribution = Distribution.objects.create(
+            name="test",
+            link_id="T000/B000/one",
+            is_active=True,
+            distribution_hour_link=time(9),
+            end_available_distribution_link=time(12),
+            owner=nora,
+        )
+        self.delivery = Delivery.objects.create(
+            menu=Menu.objects.create(owner=nora, name="menu"),
+            distribution=self.distribution,
+            date=date.today(),
+            owner=nora,
+        )
+
+    def test_delivery_is_marked_as_sent(self):
+        with SlackStubServer() as server, override_settings(SLACK_SERVICE_URL=server.url):
+            call_send_link_task(self.distribution.link_id, str(self.delivery.menu_delivery_id))
+        self.delivery.refresh_from_db()
+        self.assertTrue(self.delivery.was_sending)
+        self.assertIsNotNone(self.delivery.hour_sent)
+
+    @override_settings(SLACK_BACKOFF_FACTOR=0, SLACK_MAX_RETRIES=0)
+    def test_connection_error_is_counted_as_failure(self):
+        with SlackStubServer() as server:
+            url = server.url
+        with override_settings(SLACK_SERVICE_URL=url), self.assertRaises(requests.ConnectionError):
+            call_send_link_task(self.distribution.link_id, str(self.delivery.menu_delivery_id))
+        self.assertEqual(
+            SLACK_FAILURES.get(distribution=self.distribution.id, status='ConnectionError'), 1
+        )
+        self.delivery.refresh_from_db()
+        self.assertFalse(self.delivery.was_sending)
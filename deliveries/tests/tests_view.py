@@ -1,13 +1,18 @@
-from datetime import date
+import json
+import uuid
+from datetime import date, timedelta
 
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 
 from freezegun import freeze_time
+from model_mommy import mommy
 
-from commons.tests import UserLoginMixin
+from commons.tests import UserLoginMixin, QueryCaptureMixin
 from commons.library import get_datetime
 from commons.constants import EMPTY_FIELD_REQUIRED_TEXT_ES
 from deliveries.models import Delivery, DeliverySelection
@@ -95,7 +100,213 @@ class TestDeliverySelection(TestCase, UserLoginMixin):
         self.assertEqual(DeliverySelection.objects.all().count(), 1)
 
 
-class TestDeliveryAnonymous(TestCase, UserLoginMixin):
+class TestDeliverySelectionList(TestCase, UserLoginMixin, QueryCaptureMixin):
+
+    def setUp(self):
+        self.url = reverse('commensal-list')
+        self.nora = self.create_user(username='nora', is_staff=True)
+        self.plate = Plate.objects.create(name="plate 1", owner=self.nora)
+        self.distribution = Distribution.objects.create(
+            name="test",
+            link_id="link",
+            is_active=True,
+            distribution_hour_link=get_datetime(0),
+            end_available_distribution_link=get_datetime(6),
+            owner=self.nora,
+        )
+        self.menu = Menu.objects.create(owner=self.nora, name="test")
+        self.delivery = Delivery.objects.create(
+            menu=self.menu,
+            distribution=self.distribution,
+            date=date.today(),
+            owner=self.nora,
+        )
+        self.setup_logged_in_client()
+
+    def tearDown(self):
+        self.client.logout()
+        Delivery.objects.all().delete()
+        self.delete_all_user()
+
+    def create_selections(self, quantity):
+        for index in range(quantity):
+            selection = DeliverySelection.objects.create(
+                delivery=self.delivery,
+                name="commensal {}".format(index),
+                description="",
+                owner=self.nora,
+            )
+            selection.plates.add(self.plate)
+
+    def test_list_queries_do_not_depend_on_rows(self):
+        response = self.assertQueriesDoNotDependOnRows(self.url, self.create_selections)
+        self.assertContains(response, 'commensal 0')
+
+
+class TestDeliverySummary(TestCase, UserLoginMixin, QueryCaptureMixin):
+
+    def setUp(self):
+        self.url = reverse('commensal-summary')
+        self.nora = self.create_user(username='nora', is_staff=True)
+        self.plate_1 = Plate.objects.create(name="plate 1", owner=self.nora)
+        self.plate_2 = Plate.objects.create(name="plate 2", owner=self.nora)
+        self.distribution = Distribution.objects.create(
+            name="test",
+            link_id="link",
+            is_active=True,
+            distribution_hour_link=get_datetime(0),
+            end_available_distribution_link=get_datetime(6),
+            owner=self.nora,
+        )
+        self.lunch = self.create_delivery("almuerzo", date.today())
+        self.dinner = self.create_delivery("cena", date.today())
+        self.tomorrow = self.create_delivery("mañana", date.today() + timedelta(days=1))
+        self.setup_logged_in_client()
+
+    def tearDown(self):
+        self.client.logout()
+        Delivery.objects.all().delete()
+        self.delete_all_user()
+
+    def create_delivery(self, name, delivery_date):
+        return Delivery.objects.create(
+            menu=Menu.objects.create(owner=self.nora, name=name),
+            distribution=self.distribution,
+            date=delivery_date,
+            owner=self.nora,
+        )
+
+    def create_selection(self, delivery, *plates):
+        selection = DeliverySelection.objects.create(
+            delivery=delivery,
+            name="commensal",
+            description="",
+            owner=self.nora,
+        )
+        selection.plates.add(*plates)
+
+    def create_selections(self, quantity):
+        for _ in range(quantity):
+            self.create_selection(self.lunch, self.plate_1, self.plate_2)
+            self.create_selection(self.dinner, self.plate_2)
+
+    def test_summary_counts_plates_per_delivery(self):
+        self.create_selection(self.lunch, self.plate_1, self.plate_2)
+        self.create_selection(self.lunch, self.plate_1)
+        self.create_selection(self.dinner, self.plate_2)
+        self.create_selection(self.tomorrow, self.plate_2)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        summary = [
+            (delivery['menu'], [(plate['plate__name'], plate['total']) for plate in delivery['plates']])
+            for delivery in response.context_data['deliveries']
+        ]
+        self.assertEqual(summary, [
+            ("almuerzo", [("plate 1", 2), ("plate 2", 1)]),
+            ("cena", [("plate 2", 1)]),
+        ])
+
+    def test_summary_filters_by_date(self):
+        self.create_selection(self.tomorrow, self.plate_2)
+        response = self.client.get(self.url, {'date': self.tomorrow.date.strftime('%d/%m/%Y')})
+        self.assertEqual(response.context_data['deliveries'][0]['menu'], "mañana")
+
+    def test_summary_queries_do_not_depend_on_selections(self):
+        self.assertQueriesDoNotDependOnRows(self.url, self.create_selections)
+
+
+class TestDeliverySelectionExport(TestCase, UserLoginMixin):
+
+    def setUp(self):
+        self.url = reverse('commensal-export')
+        self.nora = self.create_user(username='nora', is_staff=True)
+        self.plate_1 = Plate.objects.create(name="plate 1", owner=self.nora)
+        self.plate_2 = Plate.objects.create(name="plate 2", owner=self.nora)
+        self.distribution = self.create_distribution("test")
+        self.other_distribution = self.create_distribution("other")
+        self.delivery = self.create_delivery(self.distribution, date(2019, 11, 15))
+        self.other_delivery = self.create_delivery(self.other_distribution, date(2019, 11, 16))
+        self.create_selection(self.delivery, "Corchito", self.plate_2, self.plate_1)
+        self.create_selection(self.other_delivery, "Nora", self.plate_2)
+        self.setup_logged_in_client()
+
+    def tearDown(self):
+        self.client.logout()
+        Delivery.objects.all().delete()
+        self.delete_all_user()
+
+    def create_distribution(self, name):
+        return Distribution.objects.create(
+            name=name,
+            link_id="link",
+            is_active=True,
+            distribution_hour_link=get_datetime(0),
+            end_available_distribution_link=get_datetime(6),
+            owner=self.nora,
+        )
+
+    def create_delivery(self, distribution, delivery_date):
+        return Delivery.objects.create(
+            menu=Menu.objects.create(owner=self.nora, name="menu"),
+            distribution=distribution,
+            date=delivery_date,
+            owner=self.nora,
+        )
+
+    def create_selection(self, delivery, name, *plates):
+        selection = DeliverySelection.objects.create(
+            delivery=delivery,
+            name=name,
+            description="sin sal",
+            owner=self.nora,
+        )
+        selection.plates.add(*plates)
+
+    def get_content(self, data):
+        response = self.client.get(self.url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_csv(self):
+        content = self.get_content({})
+        self.assertEqual(content.splitlines(), [
+            'name,description,date,plates',
+            'Corchito,sin sal,15/11/2019,"plate 1,plate 2"',
+            'Nora,sin sal,16/11/2019,plate 2',
+        ])
+
+    def test_export_jsonl(self):
+        content = self.get_content({'format': 'jsonl'})
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(rows[0], {
+            'name': 'Corchito',
+            'description': 'sin sal',
+            'date': '15/11/2019',
+            'plates': ['plate 1', 'plate 2'],
+        })
+        self.assertEqual(len(rows), 2)
+
+    def test_export_filters(self):
+        content = self.get_content({'format': 'jsonl', 'distribution': self.other_distribution.id})
+        self.assertEqual([json.loads(line)['name'] for line in content.splitlines()], ['Nora'])
+        content = self.get_content({'format': 'jsonl', 'start': '16/11/2019', 'end': '16/11/2019'})
+        self.assertEqual([json.loads(line)['name'] for line in content.splitlines()], ['Nora'])
+        content = self.get_content({'format': 'jsonl', 'end': '14/11/2019'})
+        self.assertEqual(content, '')
+
+    def test_export_is_one_query(self):
+        for index in range(10):
+            self.create_selection(self.delivery, "commensal {}".format(index), self.plate_1, self.plate_2)
+        with CaptureQueriesContext(connection) as context:
+            content = self.get_content({})
+        self.assertEqual(len(content.splitlines()), 13)
+        self.assertEqual(
+            len([query for query in context.captured_queries if 'deliveries_deliveryselection' in query['sql']]),
+            1
+        )
+
+
+class TestDeliveryAnonymous(TestCase, UserLoginMixin, QueryCaptureMixin):
 
     def setUp(self):
         freezer = freeze_time('2012-01-14 03:21:34')
@@ -135,3 +346,111 @@ class TestDeliveryAnonymous(TestCase, UserLoginMixin):
     def test_get_form(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_form_queries(self):
+        response, queries = self.capture_queries('get', self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 2)
+
+    def test_get_form_uses_cached_page(self):
+        self.client.get(self.url)
+        response, queries = self.capture_queries('get', self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+    def test_cached_page_is_refreshed_on_menu_changes(self):
+        self.assertNotContains(self.client.get(self.url), 'plate 1')
+        plate = Plate.objects.get(name='plate 1')
+        self.menu.plates.add(plate)
+        self.assertContains(self.client.get(self.url), 'plate 1')
+        plate.name = 'plate renamed'
+        plate.save()
+        self.assertContains(self.client.get(self.url), 'plate renamed')
+        self.menu.plates.remove(plate)
+        self.assertNotContains(self.client.get(self.url), 'plate renamed')
+
+    def test_cached_page_is_refreshed_on_plate_side_changes(self):
+        plate = Plate.objects.get(name='plate 1')
+        plate.menus.add(self.menu)
+        self.assertContains(self.client.get(self.url), 'plate 1')
+        plate.menus.remove(self.menu)
+        self.assertNotContains(self.client.get(self.url), 'plate 1')
+        plate.menus.add(self.menu)
+        self.assertContains(self.client.get(self.url), 'plate 1')
+        plate.menus.clear()
+        self.assertNotContains(self.client.get(self.url), 'plate 1')
+
+    def test_cached_page_is_refreshed_on_plate_deletion(self):
+        plate = Plate.objects.get(name='plate 1')
+        self.menu.plates.add(plate)
+        self.assertContains(self.client.get(self.url), 'plate 1')
+        plate.delete()
+        self.assertNotContains(self.client.get(self.url), 'plate 1')
+
+    def test_cached_page_is_refreshed_on_booking_changes(self):
+        self.client.get(self.url)
+        self.distribution.end_available_distribution_link = get_datetime(0)
+        self.distribution.save()
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('sadness'))
+
+    def test_post_form_queries_do_not_depend_on_plates(self):
+        plates = Plate.objects.filter(owner=self.nora)
+        self.menu.plates.set(plates)
+        response, one_plate_queries = self.capture_queries(
+            'post',
+            self.url,
+            {'name': 'Corchito', 'plates': [plates[0].id]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        response, two_plates_queries = self.capture_queries(
+            'post',
+            self.url,
+            {'name': 'Corchito', 'plates': [plate.id for plate in plates]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(len(one_plate_queries), len(two_plates_queries))
+        self.assertEqual(DeliverySelection.objects.all().count(), 2)
+
+    def test_missing_delivery_redirects(self):
+        url = reverse(
+            'delivery-selection',
+            kwargs={'id': '5ed8f2f1-54b4-4b3e-a5c5-2ff2e58fdd0d'}
+        )
+        response = self.client.post(url, data={'name': 'Corchito'})
+        self.assertRedirects(response, reverse('sadness'))
+
+
+class TestDeliveryIdentifiers(TestCase, UserLoginMixin):
+
+    def setUp(self):
+        self.nora = self.create_user(username='nora', is_staff=True)
+        self.distribution = mommy.make(Distribution, owner=self.nora)
+        self.menu = mommy.make(Menu, owner=self.nora)
+
+    def create_delivery(self, **kwargs):
+        return Delivery.objects.create(
+            menu=self.menu,
+            distribution=self.distribution,
+            owner=self.nora,
+            **kwargs
+        )
+
+    def test_ids_are_time_ordered(self):
+        with freeze_time('2019-06-01 10:00:00'):
+            first = self.create_delivery(date=date(2019, 6, 3))
+        with freeze_time('2019-06-01 10:00:01'):
+            second = self.create_delivery(date=date(2019, 6, 3))
+        self.assertEqual(first.menu_delivery_id.version, 7)
+        self.assertLess(first.menu_delivery_id, second.menu_delivery_id)
+
+    def test_default_ordering_by_date(self):
+        with freeze_time('2019-06-01 10:00:00'):
+            late = self.create_delivery(date=date(2019, 6, 5))
+        with freeze_time('2019-06-01 10:00:01'):
+            early = self.create_delivery(date=date(2019, 6, 3))
+        legacy = self.create_delivery(
+            menu_delivery_id=uuid.UUID('02d9cf84-6ec9-4dca-bc2e-8eaee718927f'),
+            date=date(2019, 6, 4)
+        )
+        self.assertEqual(list(Delivery.objects.all()), [early, legacy, late])
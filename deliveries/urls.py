@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import DeliverySelectionView, DeliverySelectionListView
+from .views import DeliverySelectionView, DeliverySelectionListView, DeliverySummaryView,\
+    DeliverySelectionExportView
 
 urlpatterns = [
     path(
@@ -12,4 +13,14 @@ urlpatterns = [
         DeliverySelectionListView.as_view(),
         name='commensal-list'
     ),
+    path(
+        'commensals/summary/',
+        DeliverySummaryView.as_view(),
+        name='commensal-summary'
+    ),
+    path(
+        'commensals/export/',
+        DeliverySelectionExportView.as_view(),
+        name='commensal-export'
+    ),
 ]
@@ -1,9 +1,17 @@
+import csv
+import datetime
+import json
+from itertools import groupby
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.core.exceptions import ObjectDoesNotExist
+from django.views.generic import TemplateView
 from django.views.generic.edit import FormView
 from django.urls import reverse_lazy
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.views.generic.base import View
+from commons.library import parse_date
 from commons.views import CommonMixinListView
 from .models import Delivery, DeliverySelection
 from .forms import DeliverySelectionForm
@@ -14,39 +22,146 @@ class DeliverySelectionView(FormView):
     template_name = 'deliveries/selection.html'
     success_url = reverse_lazy('thanks')
 
-    def get(self, request, *args, **kwargs):
+    def get_delivery(self):
         delivery_id = str(self.kwargs.get('id'))
+        return Delivery.objects.select_related('distribution', 'menu')\
+            .get(menu_delivery_id=delivery_id)
+
+    def dispatch(self, request, *args, **kwargs):
         try:
-            delivery = Delivery.objects.get(menu_delivery_id=delivery_id)
+            self.delivery = self.get_delivery()
         except ObjectDoesNotExist:
             return HttpResponseRedirect(reverse_lazy('sadness'))
 
-        if (delivery.is_finished_booking()):
+        if (self.delivery.is_finished_booking()):
             return HttpResponseRedirect(reverse_lazy('sadness'))
-        return super(DeliverySelectionView, self).get(request, args, kwargs)
+        return super(DeliverySelectionView, self).dispatch(request, *args, **kwargs)
 
     def get_success_url(self):
         return self.success_url
 
+    def get_context_data(self, **kwargs):
+        kwargs = super(DeliverySelectionView, self).get_context_data(**kwargs)
+        kwargs['delivery'] = self.delivery
+        kwargs['selection_cache_timeout'] = settings.DELIVERY_SELECTION_CACHE_TIMEOUT
+        return kwargs
+
     def get_form_kwargs(self):
         kwargs = super(DeliverySelectionView, self).get_form_kwargs()
-        kwargs['id'] = str(self.kwargs.get('id'))
+        kwargs['delivery'] = self.delivery
         return kwargs
 
     def form_valid(self, form):
         cleaned_data = form.cleaned_data
-        delivery_id = str(self.kwargs.get('id'))
-        delivery = Delivery.objects.get(menu_delivery_id=delivery_id)
         delivery_selection = DeliverySelection.objects.create(
             name=cleaned_data['name'],
             description=cleaned_data['description'],
-            delivery_id=delivery_id,
-            owner=delivery.owner
+            delivery=self.delivery,
+            owner_id=self.delivery.owner_id
         )
-        delivery_selection.plates.set(cleaned_data['plates'])
+        delivery_selection.plates.add(*cleaned_data['plates'])
         return HttpResponseRedirect(self.get_success_url())
 
 
 @method_decorator(login_required, name='dispatch')
 class DeliverySelectionListView(CommonMixinListView):
     model = DeliverySelection
+    select_related_fields = ('delivery',)
+    prefetch_related_fields = ('plates',)
+
+
+@method_decorator(login_required, name='dispatch')
+class DeliverySummaryView(TemplateView):
+    '''
+    Plates to cook for the deliveries of a day, by default today
+    '''
+    template_name = 'deliveries/summary.html'
+
+    def get_date(self):
+        return parse_date(self.request.GET.get('date')) or datetime.date.today()
+
+    def get_context_data(self, **kwargs):
+        kwargs = super(DeliverySummaryView, self).get_context_data(**kwargs)
+        date = self.get_date()
+        rows = DeliverySelection.get_plates_summary(self.request.user, date)
+        kwargs['date'] = date
+        kwargs['deliveries'] = [
+            {'menu': menu_name, 'plates': list(plates)}
+            for (delivery_id, menu_name), plates in groupby(
+                rows,
+                key=lambda row: (
+                    row['deliveryselection__delivery_id'],
+                    row['deliveryselection__delivery__menu__name']
+                )
+            )
+        ]
+        return kwargs
+
+
+class Echo:
+    '''
+    File like object returning what is written, for streaming csv rows
+    '''
+    def write(self, value):
+        return value
+
+
+@method_decorator(login_required, name='dispatch')
+class DeliverySelectionExportView(View):
+    '''
+    Stream the selections of the commensals as csv or as json lines,
+    filtered with ?start=, ?end= (dd/mm/yyyy) and ?distribution=. The rows
+    are read with one query through a server side cursor, with the plates
+    joined in the same query, so the memory does not grow with the export
+    '''
+    chunk_size = 2000
+    fields = ('name', 'description', 'date', 'plates')
+
+    def get_queryset(self):
+        queryset = DeliverySelection.objects.filter(owner=self.request.user)
+        start = parse_date(self.request.GET.get('start'))
+        end = parse_date(self.request.GET.get('end'))
+        distribution = self.request.GET.get('distribution', '')
+        if start:
+            queryset = queryset.filter(delivery__date__gte=start)
+        if end:
+            queryset = queryset.filter(delivery__date__lte=end)
+        if distribution.isdigit():
+            queryset = queryset.filter(delivery__distribution_id=distribution)
+        return queryset
+
+    def get_rows(self):
+        values = self.get_queryset()\
+            .values_list('id', 'name', 'description', 'delivery__date', 'plates__name')\
+            .order_by('delivery__date', 'id', 'plates__name')\
+            .iterator(chunk_size=self.chunk_size)
+        for (selection_id, name, description, date), plates in groupby(
+                values, key=lambda value: value[:4]):
+            yield {
+                'name': name,
+                'description': description,
+                'date': date.strftime(settings.DATE_FORMAT),
+                'plates': [plate[4] for plate in plates if plate[4] is not None],
+            }
+
+    def stream_csv(self):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.fields)
+        for row in self.get_rows():
+            row['plates'] = ','.join(row['plates'])
+            yield writer.writerow([row[field] for field in self.fields])
+
+    def stream_jsonl(self):
+        for row in self.get_rows():
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('format') == 'jsonl':
+            response = StreamingHttpResponse(
+                self.stream_jsonl(), content_type='application/x-ndjson')
+            extension = 'jsonl'
+        else:
+            response = StreamingHttpResponse(self.stream_csv(), content_type='text/csv')
+            extension = 'csv'
+        response['Content-Disposition'] = 'attachment; filename="comensales.{}"'.format(extension)
+        return response
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distributions', '0007_auto_20190613_2242'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='distribution',
+            index=models.Index(fields=['owner', 'name'], name='distributio_owner_i_a2bae4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='distribution',
+            index=models.Index(fields=['owner', '-created'], name='distributio_owner_i_b309a3_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distributions', '0008_auto_20261018_0414'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='distribution',
+            name='distributio_owner_i_b309a3_idx',
+        ),
+        migrations.AddIndex(
+            model_name='distribution',
+            index=models.Index(fields=['owner', '-created', '-id'], name='distributio_owner_i_98b6bc_idx'),
+        ),
+    ]
@@ -34,6 +34,10 @@ class Distribution(TimeStampedModel):
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['owner', 'name']),
+            models.Index(fields=['owner', '-created', '-id']),
+        ]
 
     def __str__(self):
         return self.name
@@ -1,9 +1,10 @@
 import unittest
 from django.urls import reverse
 from rest_framework import status
+from model_mommy import mommy
 
 
-from commons.tests import APITestBaseCase
+from commons.tests import APITestBaseCase, QueryBudgetMixin
 from commons.constants import EMPTY_FIELD_ERROR_TEXT, TEXT_WITH_210_CHARACTERS,\
     EMPTY_FIELD_REQUIRED_TEXT, get_maximum_error_text_in_field
 from distributions.models import Distribution
@@ -303,3 +304,17 @@ class DistributionTest(APITestBaseCase):
         self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
 
         self.assertEqual(Distribution.objects.count(), 1)
+
+
+class DistributionQueryBudgetTest(QueryBudgetMixin, APITestBaseCase):
+    '''
+    Query budgets of the distribution endpoints
+    '''
+    query_budgets = {
+        '/api/distributions/': 1,
+        '/api/distributions/{self.distribution.id}/': 1,
+    }
+
+    def create_query_budget_data(self):
+        for index in range(5):
+            self.distribution = mommy.make(Distribution, name="distribution {}".format(index), owner=self.user)
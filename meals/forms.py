@@ -1,13 +1,15 @@
-from django.forms import ModelForm, ModelMultipleChoiceField
+from django.forms import ModelForm
+from django.urls import reverse_lazy
+from commons.forms import OwnerModelMultipleChoiceField
 from commons.widgets import SelectMultiplePickerInput
 from tags.models import Tag
 from .models import Meal
 
 
 class MealModelForm(ModelForm):
-    tags = ModelMultipleChoiceField(
+    tags = OwnerModelMultipleChoiceField(
         required=False,
-        widget=SelectMultiplePickerInput(),
+        widget=SelectMultiplePickerInput(search_url=reverse_lazy('tag-search')),
         queryset=Tag.objects.all()
     )
 
@@ -20,9 +22,7 @@ class MealModelForm(ModelForm):
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super(MealModelForm, self).__init__(*args, **kwargs)
-        tags = Tag.objects\
-            .filter(owner=user)
-        self.fields['tags'].queryset = tags
+        self.fields['tags'].set_owner(user)
 
         if 'tags' in self.initial:
             self.fields['tags'].initial = self.initial['tags']
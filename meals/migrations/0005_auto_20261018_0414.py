@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0004_auto_20190613_1931'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['owner', 'name'], name='meals_meal_owner_i_0f4f74_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['owner', '-created'], name='meals_meal_owner_i_0e4670_idx'),
+        ),
+    ]
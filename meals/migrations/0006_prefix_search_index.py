@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from commons.db import prefix_search_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0005_auto_20261018_0414'),
+    ]
+
+    operations = [
+        prefix_search_index('meals_meal'),
+    ]
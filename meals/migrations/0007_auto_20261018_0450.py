@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0006_prefix_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='meal',
+            name='meals_meal_owner_i_0e4670_idx',
+        ),
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['owner', '-created', '-id'], name='meals_meal_owner_i_af7d1c_idx'),
+        ),
+    ]
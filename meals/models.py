@@ -23,9 +23,13 @@ class Meal(TimeStampedModel):
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['owner', 'name']),
+            models.Index(fields=['owner', '-created', '-id']),
+        ]
 
     def __str__(self):
         return "[{}] {}".format(",".join(self.get_tags()), self.name)
 
     def get_tags(self):
-        return self.tags.values_list('name', flat=True)
+        return [tag.name for tag in self.tags.all()]
@@ -2,7 +2,7 @@ import unittest
 from django.urls import reverse
 from rest_framework import status
 
-from commons.tests import APITestBaseCase
+from commons.tests import APITestBaseCase, QueryBudgetMixin, QueryCaptureMixin
 from commons.constants import EMPTY_FIELD_ERROR_TEXT, TEXT_WITH_210_CHARACTERS,\
     get_maximum_error_text_in_field
 
@@ -479,3 +479,179 @@ class MealTest(APITestBaseCase):
         self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
 
         self.assertEqual(Meal.objects.count(), 1)
+
+
+class MealQueriesTest(QueryCaptureMixin, APITestBaseCase):
+    '''
+    Tests belong to the number of queries of the meal endpoints
+    '''
+    url_list = '/api/meals/'
+
+    def setUp(self):
+        self.tag = Tag.objects.create(name="first tag", owner=self.user)
+        super(MealQueriesTest, self).setUp()
+
+    def tearDown(self):
+        Meal.objects.all().delete()
+        Tag.objects.all().delete()
+        super(MealQueriesTest, self).tearDown()
+
+    def create_meals(self, quantity):
+        for index in range(quantity):
+            meal = Meal.objects.create(name="meal {}".format(index), owner=self.user)
+            meal.tags.add(self.tag)
+
+    def test_list_queries_do_not_depend_on_rows(self):
+        '''
+        test with the main purpose that listing meals costs the same
+        number of queries for one or many meals
+        '''
+        self.client.force_authenticate(user=self.user)
+        self.assertQueriesDoNotDependOnRows(self.url_list, self.create_meals)
+
+
+class MealBulkTest(QueryCaptureMixin, APITestBaseCase):
+    '''
+    Tests belong to the bulk creation and update of meals
+    '''
+    url_bulk = '/api/meals/bulk/'
+
+    def setUp(self):
+        self.tag = Tag.objects.create(name="first tag", owner=self.user)
+        self.other_tag = Tag.objects.create(name="other tag", owner=self.other_user)
+        super(MealBulkTest, self).setUp()
+
+    def tearDown(self):
+        Meal.objects.all().delete()
+        Tag.objects.all().delete()
+        super(MealBulkTest, self).tearDown()
+
+    def test_bulk_create_meals(self):
+        '''
+        test with the main purpose that the user can create many meals
+        with their tags in one request
+        '''
+        self.client.force_authenticate(user=self.user)
+        data = [
+            {"name": "first meal", "tags": [self.tag.id]},
+            {"name": "second meal"},
+            {"name": "third meal", "tags": []},
+        ]
+        response = self.client.post(self.url_bulk, data, format='json')
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        elements = response.json()
+        self.assertEqual([element['name'] for element in elements], [item['name'] for item in data])
+        self.assertEqual(elements[0]['tags'], [self.tag.name])
+        self.assertEqual(elements[0]['owner'], self.user.username)
+        self.assertEqual(Meal.objects.filter(owner=self.user).count(), 3)
+        self.assertEqual(list(Meal.objects.get(name="first meal").tags.all()), [self.tag])
+
+    def test_bulk_create_with_tags_of_other_user(self):
+        '''
+        test with the main purpose that the user can not link tags of other
+        users and nothing is created
+        '''
+        self.client.force_authenticate(user=self.user)
+        data = [
+            {"name": "first meal", "tags": [self.tag.id]},
+            {"name": "second meal", "tags": [self.other_tag.id]},
+        ]
+        response = self.client.post(self.url_bulk, data, format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn(str(self.other_tag.id), response.json()['tags'])
+        self.assertEqual(Meal.objects.count(), 0)
+
+    def test_bulk_create_with_errors(self):
+        '''
+        test with the main purpose that invalid objects are reported and
+        nothing is created
+        '''
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.url_bulk, [{"name": "meal"}, {"name": ""}], format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn('name', response.json()[1])
+        response = self.client.post(self.url_bulk, {"name": "meal"}, format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(Meal.objects.count(), 0)
+
+    def create_meals(self, quantity, owner=None):
+        meals = [Meal.objects.create(name="meal {}".format(index), owner=owner or self.user) for index in range(quantity)]
+        for meal in meals:
+            meal.tags.add(self.tag)
+        return meals
+
+    def test_bulk_update_meals(self):
+        '''
+        test with the main purpose that the user can rename many meals and
+        replace their tags in one request
+        '''
+        self.client.force_authenticate(user=self.user)
+        first, second = self.create_meals(2)
+        new_tag = Tag.objects.create(name="new tag", owner=self.user)
+        data = [
+            {"id": second.id, "name": "second renamed", "tags": [new_tag.id, self.tag.id]},
+            {"id": first.id, "name": "first renamed"},
+        ]
+        response = self.client.put(self.url_bulk, data, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [(element['name'], sorted(element['tags'])) for element in response.json()],
+            [("second renamed", ["first tag", "new tag"]), ("first renamed", [])]
+        )
+        self.assertEqual(Meal.objects.get(id=first.id).name, "first renamed")
+        self.assertEqual(set(Meal.objects.get(id=second.id).tags.all()), {self.tag, new_tag})
+
+    def test_bulk_partial_update_keeps_missing_tags(self):
+        self.client.force_authenticate(user=self.user)
+        meal, = self.create_meals(1)
+        response = self.client.patch(self.url_bulk, [{"id": meal.id, "name": "renamed"}], format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(response.json()[0]['tags'], [self.tag.name])
+        self.assertEqual(Meal.objects.get(id=meal.id).name, "renamed")
+
+    def test_bulk_update_checks_the_owner(self):
+        '''
+        test with the main purpose that meals and tags of other users are
+        rejected and nothing is updated
+        '''
+        self.client.force_authenticate(user=self.user)
+        meal, = self.create_meals(1)
+        other_meal = Meal.objects.create(name="other meal", owner=self.other_user)
+        data = [{"id": meal.id, "name": "renamed"}, {"id": other_meal.id, "name": "renamed"}]
+        response = self.client.put(self.url_bulk, data, format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn(str(other_meal.id), response.json()['id'])
+        data = [{"id": meal.id, "name": "renamed", "tags": [self.other_tag.id]}]
+        response = self.client.put(self.url_bulk, data, format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        response = self.client.put(self.url_bulk, [{"name": "renamed"}], format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(Meal.objects.get(id=meal.id).name, "meal 0")
+        self.assertEqual(list(Meal.objects.get(id=meal.id).tags.all()), [self.tag])
+
+    def test_bulk_update_queries_do_not_depend_on_items(self):
+        self.client.force_authenticate(user=self.user)
+        counts = []
+        for quantity in (2, 10):
+            meals = self.create_meals(quantity)
+            data = [{"id": meal.id, "name": "renamed", "tags": [self.tag.id]} for meal in meals]
+            response, queries = self.capture_queries('put', self.url_bulk, data, format='json')
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class MealQueryBudgetTest(QueryBudgetMixin, APITestBaseCase):
+    '''
+    Query budgets of the meal endpoints
+    '''
+    query_budgets = {
+        '/api/meals/': 2,
+        '/api/meals/{self.meal.id}/': 2,
+    }
+
+    def create_query_budget_data(self):
+        tags = [Tag.objects.create(name="tag {}".format(index), owner=self.user) for index in range(3)]
+        for index in range(5):
+            self.meal = Meal.objects.create(name="meal {}".format(index), owner=self.user)
+            self.meal.tags.set(tags)
@@ -1,7 +1,8 @@
 from rest_framework import status
+from django.core.cache import cache
 from django.urls import reverse
 from django.test import TestCase
-from commons.tests import UserLoginMixin
+from commons.tests import UserLoginMixin, QueryCaptureMixin
 from commons.constants import EMPTY_FIELD_REQUIRED_TEXT_ES
 from tags.models import Tag
 from meals.models import Meal
@@ -123,6 +124,14 @@ class TestMealUpdate(TestCase, UserLoginMixin):
         self.assertEqual(meal.name, data['name'])
         self.assertEqual(Meal.objects.all().count(), 1)
 
+    def test_get_form_renders_only_selected_tags(self):
+        tags = [Tag.objects.create(name="tag {}".format(index), owner=self.nora) for index in range(20)]
+        self.meal.tags.add(tags[3])
+        response = self.client.get(self.url)
+        self.assertContains(response, '<option value="{}" selected>tag 3</option>'.format(tags[3].id), html=True)
+        self.assertNotContains(response, 'tag 4')
+        self.assertContains(response, reverse('tag-search'))
+
 
 class TestMealDelete(TestCase, UserLoginMixin):
 
@@ -175,3 +184,54 @@ class TestMealAnonymous(TestCase):
     def test_get_form(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+
+
+class TestMealList(TestCase, UserLoginMixin, QueryCaptureMixin):
+
+    def setUp(self):
+        self.url = reverse('meal-list')
+        self.nora = self.create_user(username='nora', is_staff=True)
+        self.tag = Tag.objects.create(name="tag 1", owner=self.nora)
+        self.setup_logged_in_client()
+        cache.clear()
+
+    def tearDown(self):
+        self.client.logout()
+        Meal.objects.all().delete()
+        Tag.objects.all().delete()
+        self.delete_all_user()
+
+    def create_meals(self, quantity):
+        for index in range(quantity):
+            meal = Meal.objects.create(owner=self.nora, name="meal {}".format(index))
+            meal.tags.add(self.tag)
+
+    def test_list_queries_do_not_depend_on_rows(self):
+        response = self.assertQueriesDoNotDependOnRows(self.url, self.create_meals)
+        self.assertContains(response, '[tag 1] meal 0')
+
+    def test_cached_rows_skip_row_queries(self):
+        self.create_meals(10)
+        response, cold_queries = self.capture_queries('get', self.url)
+        response, cached_queries = self.capture_queries('get', self.url)
+        self.assertLess(len(cached_queries), len(cold_queries))
+        self.assertContains(self.client.get(self.url), '[tag 1] meal 9')
+
+    def test_changes_invalidate_cached_rows(self):
+        self.create_meals(2)
+        self.client.get(self.url)
+        Meal.objects.create(owner=self.nora, name='meal new')
+        self.assertContains(self.client.get(self.url), 'meal new')
+        self.tag.name = 'tag renamed'
+        self.tag.save()
+        self.assertContains(self.client.get(self.url), '[tag renamed] meal 0')
+        Meal.objects.get(name='meal 1').delete()
+        self.assertNotContains(self.client.get(self.url), 'meal 1')
+
+    def test_rows_are_cached_by_owner(self):
+        self.create_meals(1)
+        self.client.get(self.url)
+        self.create_user(username='other')
+        self.client.logout()
+        self.client.login(username='other', password=self.password)
+        self.assertNotContains(self.client.get(self.url), 'meal 0')
@@ -3,26 +3,23 @@ from django.utils.decorators import method_decorator
 from django.urls import reverse_lazy
 from django.http import HttpResponseRedirect
 
-from rest_framework.authentication import SessionAuthentication, BasicAuthentication
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from rest_framework import viewsets
-
 from commons.views import CommonMixinListView, CommonMixinCreateView,\
-    CommonMixinUpdateView, CommonMixinDeleteView
+    CommonMixinUpdateView, CommonMixinDeleteView, CommonMixinViewSet, BulkCreateMixin,\
+    SearchMixin
 from tags.models import Tag
 from .serializers import MealSerializer
 from .forms import MealModelForm
 from .models import Meal
 
 
-class MealViewSet(viewsets.ModelViewSet):
+class MealViewSet(SearchMixin, BulkCreateMixin, CommonMixinViewSet):
     '''
     View for Meal
     '''
-    authentication_classes = (SessionAuthentication, BasicAuthentication)
-    permission_classes = (IsAuthenticated, IsAuthenticatedOrReadOnly)
     queryset = Meal.objects.all()
     serializer_class = MealSerializer
+    prefetch_related_fields = ('tags',)
+    bulk_related_field = 'tags'
 
     def get_tags(self, data):
         tags = []
@@ -42,9 +39,6 @@ class MealViewSet(viewsets.ModelViewSet):
             tags=self.get_tags(self.request.data)
         )
 
-    def get_queryset(self):
-        return Meal.objects.filter(owner=self.request.user)
-
 
 @method_decorator(login_required, name='dispatch')
 class MealListView(CommonMixinListView):
@@ -52,6 +46,7 @@ class MealListView(CommonMixinListView):
     create_url = 'meal-create'
     update_url = 'meal-update'
     delete_url = 'meal-delete'
+    prefetch_related_fields = ('tags',)
 
 
 @method_decorator(login_required, name='dispatch')
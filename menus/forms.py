@@ -1,17 +1,19 @@
 from datetime import date
 
 from django.conf import settings
-from django.forms import ModelForm, ModelMultipleChoiceField, DateField
+from django.forms import Form, ModelForm, DateField, CharField, formset_factory
+from django.urls import reverse_lazy
 
+from commons.forms import OwnerModelMultipleChoiceField
 from commons.widgets import SelectMultiplePickerInput, DatePickerInput
 from plates.models import Plate
 from .models import Menu
 
 
 class MenuModelForm(ModelForm):
-    plates = ModelMultipleChoiceField(
+    plates = OwnerModelMultipleChoiceField(
         required=True,
-        widget=SelectMultiplePickerInput(),
+        widget=SelectMultiplePickerInput(search_url=reverse_lazy('plate-search')),
         queryset=Plate.objects.all()
     )
 
@@ -35,8 +37,35 @@ class MenuModelForm(ModelForm):
         super(MenuModelForm, self).__init__(*args, **kwargs)
         if ('deliveries' in self.initial):
             self.fields['date'].initial = self.initial['deliveries'].first().date
-        plates = Plate.objects\
-            .filter(owner=user)
-        self.fields['plates'].widget.queryset = plates
+        self.fields['plates'].set_owner(user)
         if 'plates' in self.initial:
             self.fields['plates'].initial = self.initial['plates']
+
+
+class MenuScheduleForm(Form):
+    name = CharField(
+        label='Nombre',
+        max_length=200
+    )
+    date = DateField(
+        label='Fecha',
+        input_formats=[settings.DATE_FORMAT],
+        widget=DatePickerInput(
+            attrs={
+                'placeholder': 'Seleccione una fecha',
+                'minDate': date.today()
+            }
+        ))
+    plates = OwnerModelMultipleChoiceField(
+        label='Platos',
+        widget=SelectMultiplePickerInput(search_url=reverse_lazy('plate-search')),
+        queryset=Plate.objects.all()
+    )
+
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop('user', None)
+        super(MenuScheduleForm, self).__init__(*args, **kwargs)
+        self.fields['plates'].set_owner(user)
+
+
+MenuScheduleFormSet = formset_factory(MenuScheduleForm, extra=7)
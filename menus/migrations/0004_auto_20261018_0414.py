@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0003_auto_20190613_1904'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['owner', 'name'], name='menus_menu_owner_i_78bdfb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['owner', '-created'], name='menus_menu_owner_i_c74af9_idx'),
+        ),
+    ]
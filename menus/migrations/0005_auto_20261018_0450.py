@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0004_auto_20261018_0414'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='menu',
+            name='menus_menu_owner_i_c74af9_idx',
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['owner', '-created', '-id'], name='menus_menu_owner_i_666b44_idx'),
+        ),
+    ]
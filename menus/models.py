@@ -1,5 +1,4 @@
-from datetime import datetime, timedelta
-from deliveries.celery import call_send_link_task
+from deliveries.scheduling import schedule_delivery_link
 from django.db import models
 from commons.models import TimeStampedModel
 from plates.models import Plate
@@ -27,35 +26,25 @@ class Menu(TimeStampedModel):
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['owner', 'name']),
+            models.Index(fields=['owner', '-created', '-id']),
+        ]
 
     def __str__(self):
         date = map(
-            lambda elem: elem.strftime('%d-%m-%Y'),
-            self.deliveries.all().values_list('date', flat=True))
+            lambda elem: elem.date.strftime('%d-%m-%Y'),
+            self.deliveries.all())
         return "{} {} {}".format(
             self.name,
             [str(','.join(date))],
-            ",".join(self.plates.all().values_list('name', flat=True))
+            ",".join(plate.name for plate in self.plates.all())
         )
 
     def send_slack_link(self):
         '''
-           build time and information for sending to slack
+           schedule the link of the menu with the other links of the same
+           distribution hour
         '''
-        delivery = self.deliveries.first()
-        distribution = delivery.distribution
-
-        delta = datetime(
-            year=delivery.date.year,
-            month=delivery.date.month,
-            day=delivery.date.day,
-            hour=distribution.distribution_hour_link.hour,
-            minute=distribution.distribution_hour_link.minute
-        )
-        try:
-            call_send_link_task.apply_async(
-                args=(distribution.link_id, str(delivery.menu_delivery_id)),
-                eta=delta + timedelta(hours=4)
-            )
-        except OSError:
-            print("Celery is down")
+        delivery = self.deliveries.select_related('distribution').first()
+        schedule_delivery_link(delivery)
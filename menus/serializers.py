@@ -1,5 +1,4 @@
-
-
+from django.conf import settings
 from rest_framework import serializers
 
 from .models import Menu
@@ -19,3 +18,15 @@ class MenuSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Menu
         fields = ('id', 'name', 'plates', 'owner')
+
+
+class MenuScheduleSerializer(serializers.Serializer):
+    '''
+    Serializer for every menu of a bulk schedule
+    '''
+    name = serializers.CharField(max_length=200)
+    date = serializers.DateField(input_formats=[settings.DATE_FORMAT, 'iso-8601'])
+    plates = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False
+    )
@@ -1,11 +1,17 @@
 import unittest
+from datetime import date, time, timedelta
+from unittest.mock import patch
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 
-from commons.tests import APITestBaseCase
+from commons.tests import APITestBaseCase, QueryBudgetMixin, QueryCaptureMixin
 from commons.constants import EMPTY_FIELD_ERROR_TEXT, TEXT_WITH_210_CHARACTERS,\
     get_maximum_error_text_in_field
 
+from deliveries.tasks import send_distribution_links_task
+from deliveries.models import Delivery
+from distributions.models import Distribution
 from plates.models import Plate
 from menus.models import Menu
 
@@ -486,3 +492,126 @@ class MenuTest(APITestBaseCase):
         self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
 
         self.assertEqual(Menu.objects.count(), 1)
+
+
+class MenuQueriesTest(QueryCaptureMixin, APITestBaseCase):
+    '''
+    Tests belong to the number of queries of the menu endpoints
+    '''
+    url_list = '/api/menus/'
+
+    def setUp(self):
+        self.plate = Plate.objects.create(name="first plate", owner=self.user)
+        super(MenuQueriesTest, self).setUp()
+
+    def tearDown(self):
+        Menu.objects.all().delete()
+        Plate.objects.all().delete()
+        super(MenuQueriesTest, self).tearDown()
+
+    def create_menus(self, quantity):
+        for index in range(quantity):
+            menu = Menu.objects.create(name="menu {}".format(index), owner=self.user)
+            menu.plates.add(self.plate)
+
+    def test_list_queries_do_not_depend_on_rows(self):
+        '''
+        test with the main purpose that listing menus costs the same
+        number of queries for one or many menus
+        '''
+        self.client.force_authenticate(user=self.user)
+        response = self.assertQueriesDoNotDependOnRows(self.url_list, self.create_menus)
+        elements = response.json()['results']
+        self.assertEqual(len(elements), 11)
+        self.assertEqual(elements[0]['plates'], [self.plate.name])
+        self.assertEqual(elements[0]['owner'], self.user.username)
+
+
+class MenuScheduleTest(APITestBaseCase):
+    '''
+    Tests belong to the planning of many menus in one request
+    '''
+    url_schedule = '/api/menus/schedule/'
+
+    def setUp(self):
+        cache.clear()
+        self.plate = Plate.objects.create(name="first plate", owner=self.user)
+        self.other_plate = Plate.objects.create(name="other plate", owner=self.other_user)
+        self.distribution = Distribution.objects.create(
+            name="test",
+            link_id="link",
+            is_active=True,
+            distribution_hour_link=time(9),
+            end_available_distribution_link=time(12),
+            owner=self.user,
+        )
+        super(MenuScheduleTest, self).setUp()
+
+    def tearDown(self):
+        Menu.objects.all().delete()
+        Plate.objects.all().delete()
+        Distribution.objects.all().delete()
+        super(MenuScheduleTest, self).tearDown()
+
+    def get_week(self, plate_id):
+        first_day = date.today() + timedelta(days=1)
+        return [
+            {
+                "name": "menu {}".format(day),
+                "date": (first_day + timedelta(days=day)).strftime('%d/%m/%Y'),
+                "plates": [plate_id]
+            }
+            for day in range(7)
+        ]
+
+    def test_schedule_a_week(self):
+        '''
+        test with the main purpose that the user can create the menus and
+        deliveries of a week in one request
+        '''
+        self.client.force_authenticate(user=self.user)
+        with patch.object(send_distribution_links_task, 'apply_async') as apply_async:
+            response = self.client.post(self.url_schedule, self.get_week(self.plate.id), format='json')
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(len(response.json()), 7)
+        self.assertEqual(response.json()[0]['plates'], [self.plate.name])
+        self.assertEqual(Menu.objects.filter(owner=self.user).count(), 7)
+        self.assertEqual(Delivery.objects.filter(distribution=self.distribution).count(), 7)
+        self.assertEqual(Menu.objects.filter(plates=self.plate).count(), 7)
+        self.assertEqual(apply_async.call_count, 7)
+
+    def test_schedule_with_plates_of_other_user(self):
+        '''
+        test with the main purpose that the user can not plan menus with
+        plates of other users
+        '''
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.url_schedule, self.get_week(self.other_plate.id), format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(Menu.objects.count(), 0)
+
+    def test_schedule_without_distribution(self):
+        '''
+        test with the main purpose that the user needs a distribution for
+        planning menus
+        '''
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.post(self.url_schedule, self.get_week(self.other_plate.id), format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(Menu.objects.count(), 0)
+
+
+class MenuQueryBudgetTest(QueryBudgetMixin, APITestBaseCase):
+    '''
+    Query budgets of the menu endpoints
+    '''
+    query_budgets = {
+        '/api/menus/': 2,
+        '/api/menus/{self.menu.id}/': 2,
+    }
+
+    def create_query_budget_data(self):
+        plates = [Plate.objects.create(name="plate {}".format(index), owner=self.user) for index in range(3)]
+        for index in range(5):
+            self.menu = Menu.objects.create(name="menu {}".format(index), owner=self.user)
+            self.menu.plates.set(plates)
@@ -1,16 +1,17 @@
 from datetime import time, date
+from unittest.mock import patch
+
 from django.test.utils import override_settings
 from django.test import TestCase
 from django.urls import reverse
 
 from rest_framework import status
 
-from commons.tests import UserLoginMixin
+from commons.tests import UserLoginMixin, QueryCaptureMixin
 from commons.constants import EMPTY_FIELD_REQUIRED_TEXT_ES
-from commons.mocks import mock_call_send_link_task
 from distributions.models import Distribution
 from deliveries.models import Delivery
-from deliveries.celery import call_send_link_task
+from deliveries.tasks import send_distribution_links_task
 from meals.models import Meal
 from menus.models import Menu
 from menus.forms import MenuModelForm
@@ -59,8 +60,8 @@ class TestMenuCreate(TestCase, UserLoginMixin):
         self.assertEqual(Menu.objects.all().count(), 0)
 
     @override_settings(CELERY_ALWAYS_EAGER=True)
-    def test_create_successful_with_plates(self):
-        call_send_link_task.apply_async = mock_call_send_link_task
+    @patch.object(send_distribution_links_task, 'apply_async')
+    def test_create_successful_with_plates(self, apply_async):
         self.assertEqual(Menu.objects.all().count(), 0)
         plate_1 = Plate.objects.create(name="plate 1", owner=self.nora)
         plate_2 = Plate.objects.create(name="plate 2", owner=self.nora)
@@ -131,8 +132,8 @@ class TestMenuUpdate(TestCase, UserLoginMixin):
         self.assertEqual(Menu.objects.all().count(), 1)
 
     @override_settings(CELERY_ALWAYS_EAGER=True)
-    def test_update_successful(self):
-        call_send_link_task.apply_async = mock_call_send_link_task
+    @patch.object(send_distribution_links_task, 'apply_async')
+    def test_update_successful(self, apply_async):
         self.assertEqual(Menu.objects.all().count(), 1)
         meal = Meal.objects.create(name="meal 1", owner=self.nora)
         plate_1 = Plate.objects.create(name="plate 1", owner=self.nora)
@@ -157,6 +158,23 @@ class TestMenuUpdate(TestCase, UserLoginMixin):
         self.assertEqual(menu.name, data['name'])
         self.assertEqual(Menu.objects.all().count(), 1)
 
+    @override_settings(CELERY_ALWAYS_EAGER=True)
+    @patch.object(send_distribution_links_task, 'apply_async')
+    def test_update_date_sends_link_again(self, apply_async):
+        Delivery.objects.filter(pk=self.delivery.pk).update(was_sending=True, hour_sent=time())
+        plate = Plate.objects.create(name="plate 1", owner=self.nora)
+        data = {
+            'name': 'Vegetariano',
+            'date': '15/11/2019',
+            'plates': [plate.id]
+        }
+
+        self.client.post(self.url, data=data, follow=True)
+        delivery = Delivery.objects.get(pk=self.delivery.pk)
+        self.assertEqual(delivery.date, date(2019, 11, 15))
+        self.assertFalse(delivery.was_sending)
+        self.assertIsNone(delivery.hour_sent)
+
 
 class TestMenuDelete(TestCase, UserLoginMixin):
 
@@ -209,6 +227,109 @@ class TestMenuOtherUser(TestCase, UserLoginMixin):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class TestMenuList(TestCase, UserLoginMixin, QueryCaptureMixin):
+
+    def setUp(self):
+        self.url = reverse('menu-list')
+        self.nora = self.create_user(username='nora', is_staff=True)
+        self.distribution = Distribution.objects.create(
+            name="test",
+            link_id="link",
+            is_active=True,
+            distribution_hour_link=time(),
+            end_available_distribution_link=time(),
+            owner=self.nora,
+        )
+        self.plate = Plate.objects.create(name="plate 1", owner=self.nora)
+        self.setup_logged_in_client()
+
+    def tearDown(self):
+        self.client.logout()
+        Menu.objects.all().delete()
+        Plate.objects.all().delete()
+        self.delete_all_user()
+
+    def create_menus(self, quantity):
+        for index in range(quantity):
+            menu = Menu.objects.create(owner=self.nora, name="menu {}".format(index))
+            menu.plates.add(self.plate)
+            Delivery.objects.create(
+                menu=menu,
+                distribution=self.distribution,
+                date=date.today(),
+                owner=self.nora,
+            )
+
+    def test_list_queries_do_not_depend_on_rows(self):
+        self.assertQueriesDoNotDependOnRows(self.url, self.create_menus)
+
+    def test_list_renders_dates_and_plates(self):
+        self.create_menus(1)
+        response = self.client.get(self.url)
+        self.assertContains(response, date.today().strftime('%d-%m-%Y'))
+        self.assertContains(response, self.plate.name)
+
+
+class TestMenuSchedule(TestCase, UserLoginMixin):
+
+    def setUp(self):
+        self.url = reverse('menu-schedule')
+        self.nora = self.create_user(username='nora', is_staff=True)
+        self.distribution = Distribution.objects.create(
+            name="test",
+            link_id="link",
+            is_active=True,
+            distribution_hour_link=time(),
+            end_available_distribution_link=time(),
+            owner=self.nora,
+        )
+        self.plate = Plate.objects.create(name="plate 1", owner=self.nora)
+        self.setup_logged_in_client()
+
+    def tearDown(self):
+        self.client.logout()
+        Menu.objects.all().delete()
+        Plate.objects.all().delete()
+        self.delete_all_user()
+
+    def test_get_form(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('titlename', response.context_data)
+        self.assertEqual(len(response.context_data['form'].forms), 7)
+
+    @patch.object(send_distribution_links_task, 'apply_async')
+    def test_schedule_successful(self, apply_async):
+        data = {
+            'form-TOTAL_FORMS': 3,
+            'form-INITIAL_FORMS': 0,
+            'form-0-name': 'Lunes',
+            'form-0-date': '18/11/2019',
+            'form-0-plates': [self.plate.id],
+            'form-1-name': 'Martes',
+            'form-1-date': '19/11/2019',
+            'form-1-plates': [self.plate.id],
+        }
+        response = self.client.post(self.url, data=data, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.context_data['object_list']), 2)
+        self.assertEqual(
+            sorted(Delivery.objects.values_list('date', flat=True)),
+            [date(2019, 11, 18), date(2019, 11, 19)]
+        )
+
+    def test_form_errors(self):
+        data = {
+            'form-TOTAL_FORMS': 1,
+            'form-INITIAL_FORMS': 0,
+            'form-0-name': 'Lunes',
+        }
+        response = self.client.post(self.url, data=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.context_data['form'].forms[0].errors), 2)
+        self.assertEqual(Menu.objects.all().count(), 0)
+
+
 class TestMenuAnonymous(TestCase):
 
     def setUp(self):
@@ -1,31 +1,65 @@
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.utils.decorators import method_decorator
 from django.urls import reverse_lazy
 from django.http import HttpResponseRedirect
+from django.views.generic.edit import FormView
 
-from rest_framework.authentication import SessionAuthentication, BasicAuthentication
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from rest_framework import viewsets
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
+from commons.library import bulk_create_with_ids, bulk_create_m2m_rows
+from commons.signals import invalidate_models
 from commons.views import CommonMixinListView, CommonMixinCreateView,\
-    CommonMixinUpdateView, CommonMixinDeleteView
+    CommonMixinUpdateView, CommonMixinDeleteView, CommonMixinViewSet
 from plates.models import Plate
 from distributions.models import Distribution
 from deliveries.models import Delivery
+from deliveries.scheduling import schedule_deliveries_links
 
 from .models import Menu
-from .forms import MenuModelForm
-from .serializers import MenuSerializer
+from .forms import MenuModelForm, MenuScheduleFormSet
+from .serializers import MenuSerializer, MenuScheduleSerializer
 
 
-class MenuViewSet(viewsets.ModelViewSet):
+def create_scheduled_menus(owner, distribution, entries):
+    '''
+    Create the menus, their plates and their deliveries of many days with
+    bulk inserts in one transaction, then schedule all their links.
+    Entries are dicts with the name, the date and the plate ids
+    '''
+    with transaction.atomic():
+        menus = bulk_create_with_ids(Menu, [
+            Menu(owner=owner, name=entry['name']) for entry in entries
+        ])
+        bulk_create_m2m_rows(Menu, 'plates', [
+            (menu.pk, plate_id)
+            for menu, entry in zip(menus, entries)
+            for plate_id in entry['plates']
+        ])
+        deliveries = Delivery.objects.bulk_create([
+            Delivery(
+                date=entry['date'],
+                menu=menu,
+                distribution=distribution,
+                owner=owner
+            )
+            for menu, entry in zip(menus, entries)
+        ])
+        invalidate_models(Delivery, [owner])
+    schedule_deliveries_links(deliveries)
+    return menus
+
+
+class MenuViewSet(CommonMixinViewSet):
     '''
     View for Menu
     '''
-    authentication_classes = (SessionAuthentication, BasicAuthentication)
-    permission_classes = (IsAuthenticated, IsAuthenticatedOrReadOnly)
     queryset = Menu.objects.all()
     serializer_class = MenuSerializer
+    prefetch_related_fields = ('plates',)
 
     def get_plates(self, data):
         plates = []
@@ -45,8 +79,36 @@ class MenuViewSet(viewsets.ModelViewSet):
             plates=self.get_plates(self.request.data)
         )
 
-    def get_queryset(self):
-        return Menu.objects.filter(owner=self.request.user)
+    @action(detail=False, methods=['post'])
+    def schedule(self, request):
+        '''
+        Create the menus and deliveries of many days in one request
+        '''
+        distribution = Distribution.objects.filter(owner=request.user).first()
+        if not distribution:
+            return Response(
+                {'detail': 'Create a distribution first.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = MenuScheduleSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        entries = serializer.validated_data
+        plate_ids = {plate_id for entry in entries for plate_id in entry['plates']}
+        invalid_ids = plate_ids - set(
+            Plate.objects.filter(owner=request.user, id__in=plate_ids)
+            .values_list('id', flat=True)
+        )
+        if invalid_ids:
+            return Response(
+                {'plates': 'Invalid ids {}.'.format(sorted(invalid_ids))},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        menus = create_scheduled_menus(request.user, distribution, entries)
+        prefetch_related_objects(menus, 'plates')
+        return Response(
+            self.get_serializer(menus, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
 
 
 @method_decorator(login_required, name='dispatch')
@@ -54,6 +116,7 @@ class MenuListView(CommonMixinListView):
     model = Menu
     create_url = 'menu-create'
     update_url = 'menu-update'
+    prefetch_related_fields = ('deliveries', 'plates')
 
 
 @method_decorator(login_required, name='dispatch')
@@ -96,6 +159,43 @@ class MenuCreateView(CommonMixinCreateView):
         return HttpResponseRedirect(self.get_success_url())
 
 
+@method_decorator(login_required, name='dispatch')
+class MenuScheduleView(FormView):
+    form_class = MenuScheduleFormSet
+    template_name = 'crud/create.html'
+    success_url = reverse_lazy('menu-list')
+    titlename = 'Planificar Menus'
+
+    def dispatch(self, request, *args, **kwargs):
+        self.distribution = Distribution.objects\
+            .filter(owner=self.request.user).first()
+        if not self.distribution:
+            return HttpResponseRedirect(reverse_lazy('distribution-create'))
+        return super(MenuScheduleView, self).dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        kwargs = super(MenuScheduleView, self).get_context_data(**kwargs)
+        kwargs['titlename'] = self.titlename
+        return kwargs
+
+    def get_form_kwargs(self):
+        kwargs = super(MenuScheduleView, self).get_form_kwargs()
+        kwargs['form_kwargs'] = {'user': self.request.user}
+        return kwargs
+
+    def form_valid(self, form):
+        entries = [
+            {
+                'name': data['name'],
+                'date': data['date'],
+                'plates': [plate.id for plate in data['plates']]
+            }
+            for data in form.cleaned_data if data
+        ]
+        create_scheduled_menus(self.request.user, self.distribution, entries)
+        return HttpResponseRedirect(self.get_success_url())
+
+
 @method_decorator(login_required, name='dispatch')
 class MenuUpdateView(CommonMixinUpdateView):
     form_class = MenuModelForm
@@ -116,7 +216,10 @@ class MenuUpdateView(CommonMixinUpdateView):
         instance.save()
         instance.plates.set(form.cleaned_data['plates'])
         delivery = form.instance.deliveries.first()
-        delivery.date = form.cleaned_data['date']
+        if delivery.date != form.cleaned_data['date']:
+            delivery.date = form.cleaned_data['date']
+            delivery.was_sending = False
+            delivery.hour_sent = None
         delivery.save()
         instance.send_slack_link()
         return HttpResponseRedirect(self.get_success_url())
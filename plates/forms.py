@@ -1,14 +1,16 @@
-from django.forms import ModelForm, ModelMultipleChoiceField
+from django.forms import ModelForm
+from django.urls import reverse_lazy
+from commons.forms import OwnerModelMultipleChoiceField
 from commons.widgets import SelectMultiplePickerInput
 from meals.models import Meal
 from .models import Plate
 
 
 class PlateModelForm(ModelForm):
-    meals = ModelMultipleChoiceField(
+    meals = OwnerModelMultipleChoiceField(
         required=False,
-        widget=SelectMultiplePickerInput(),
-        queryset=Meal.objects.all()
+        widget=SelectMultiplePickerInput(search_url=reverse_lazy('meal-search')),
+        queryset=Meal.objects.prefetch_related('tags')
     )
 
     class Meta:
@@ -20,8 +22,6 @@ class PlateModelForm(ModelForm):
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super(PlateModelForm, self).__init__(*args, **kwargs)
-        meals = Meal.objects\
-            .filter(owner=user)
-        self.fields['meals'].widget.queryset = meals
+        self.fields['meals'].set_owner(user)
         if 'meals' in self.initial:
             self.fields['meals'].initial = self.initial['meals']
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plates', '0003_auto_20190613_1928'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='plate',
+            index=models.Index(fields=['owner', 'name'], name='plates_plat_owner_i_8ece8d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plate',
+            index=models.Index(fields=['owner', '-created'], name='plates_plat_owner_i_61311b_idx'),
+        ),
+    ]
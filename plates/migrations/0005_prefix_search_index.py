@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from commons.db import prefix_search_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plates', '0004_auto_20261018_0414'),
+    ]
+
+    operations = [
+        prefix_search_index('plates_plate'),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plates', '0005_prefix_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='plate',
+            name='plates_plat_owner_i_61311b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='plate',
+            index=models.Index(fields=['owner', '-created', '-id'], name='plates_plat_owner_i_83ddf6_idx'),
+        ),
+    ]
@@ -25,6 +25,10 @@ class Plate(TimeStampedModel):
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['owner', 'name']),
+            models.Index(fields=['owner', '-created', '-id']),
+        ]
 
     def __str__(self):
         return self.name
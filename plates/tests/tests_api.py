@@ -2,7 +2,7 @@ import unittest
 from django.urls import reverse
 from rest_framework import status
 
-from commons.tests import APITestBaseCase
+from commons.tests import APITestBaseCase, QueryBudgetMixin
 from commons.constants import EMPTY_FIELD_ERROR_TEXT, TEXT_WITH_210_CHARACTERS,\
     get_maximum_error_text_in_field
 
@@ -475,3 +475,19 @@ class PlateTest(APITestBaseCase):
         self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
 
         self.assertEqual(Plate.objects.count(), 1)
+
+
+class PlateQueryBudgetTest(QueryBudgetMixin, APITestBaseCase):
+    '''
+    Query budgets of the plate endpoints
+    '''
+    query_budgets = {
+        '/api/plates/': 2,
+        '/api/plates/{self.plate.id}/': 2,
+    }
+
+    def create_query_budget_data(self):
+        meals = [Meal.objects.create(name="meal {}".format(index), owner=self.user) for index in range(3)]
+        for index in range(5):
+            self.plate = Plate.objects.create(name="plate {}".format(index), owner=self.user)
+            self.plate.meals.set(meals)
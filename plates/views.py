@@ -2,25 +2,23 @@ from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.urls import reverse_lazy
 from django.http import HttpResponseRedirect
-from rest_framework.authentication import SessionAuthentication, BasicAuthentication
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from rest_framework import viewsets
 from commons.views import CommonMixinListView, CommonMixinCreateView,\
-    CommonMixinUpdateView, CommonMixinDeleteView
+    CommonMixinUpdateView, CommonMixinDeleteView, CommonMixinViewSet, BulkCreateMixin,\
+    SearchMixin
 from meals.models import Meal
 from .models import Plate
 from .forms import PlateModelForm
 from .serializers import PlateSerializer
 
 
-class PlateViewSet(viewsets.ModelViewSet):
+class PlateViewSet(SearchMixin, BulkCreateMixin, CommonMixinViewSet):
     '''
     View for Plate
     '''
-    authentication_classes = (SessionAuthentication, BasicAuthentication)
-    permission_classes = (IsAuthenticated, IsAuthenticatedOrReadOnly)
     queryset = Plate.objects.all()
     serializer_class = PlateSerializer
+    prefetch_related_fields = ('meals',)
+    bulk_related_field = 'meals'
 
     def get_meals(self, data):
         meals = []
@@ -40,9 +38,6 @@ class PlateViewSet(viewsets.ModelViewSet):
             meals=self.get_meals(self.request.data)
         )
 
-    def get_queryset(self):
-        return Plate.objects.filter(owner=self.request.user)
-
 
 @method_decorator(login_required, name='dispatch')
 class PlateListView(CommonMixinListView):
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tags', '0003_auto_20190613_1906'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['owner', 'name'], name='tags_tag_owner_i_7daf02_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['owner', '-created'], name='tags_tag_owner_i_1a75e0_idx'),
+        ),
+    ]
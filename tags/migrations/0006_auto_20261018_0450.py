@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tags', '0005_prefix_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tag',
+            name='tags_tag_owner_i_1a75e0_idx',
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['owner', '-created', '-id'], name='tags_tag_owner_i_2bed6e_idx'),
+        ),
+    ]
@@ -16,6 +16,10 @@ class Tag(TimeStampedModel):
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['owner', 'name']),
+            models.Index(fields=['owner', '-created', '-id']),
+        ]
 
     def __str__(self):
         return self.name
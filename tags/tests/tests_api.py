@@ -1,8 +1,12 @@
 import unittest
+from datetime import timedelta
+from unittest.mock import patch
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 
-from commons.tests import APITestBaseCase
+from commons.tests import APITestBaseCase, QueryBudgetMixin
+from commons.pagination import CommonCursorPagination
 from commons.constants import EMPTY_FIELD_ERROR_TEXT, TEXT_WITH_210_CHARACTERS,\
     get_maximum_error_text_in_field
 
@@ -293,3 +297,145 @@ class TagTest(APITestBaseCase):
         self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
 
         self.assertEqual(Tag.objects.count(), 1)
+
+
+class TagPaginationTest(APITestBaseCase):
+    '''
+    Tests belong to the cursor pagination of the api endpoints
+    '''
+    url_list = '/api/tags/'
+
+    def setUp(self):
+        now = timezone.now()
+        for index in range(5):
+            tag = Tag.objects.create(name="tag {}".format(index), owner=self.user)
+            Tag.objects.filter(id=tag.id).update(created=now - timedelta(minutes=index))
+        super(TagPaginationTest, self).setUp()
+
+    def tearDown(self):
+        Tag.objects.all().delete()
+        super(TagPaginationTest, self).tearDown()
+
+    def test_follow_cursor_through_all_pages(self):
+        '''
+        test with the main purpose that following the next links returns
+        every tag once, even when a tag is created between pages
+        '''
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url_list, {'page_size': 2})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        page = response.json()
+        self.assertEqual(len(page['results']), 2)
+        self.assertIsNone(page['previous'])
+        names = [tag['name'] for tag in page['results']]
+        new_tag = Tag.objects.create(name="new tag", owner=self.user)
+        Tag.objects.filter(id=new_tag.id).update(created=timezone.now() + timedelta(hours=1))
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            names += [tag['name'] for tag in page['results']]
+        self.assertEqual(len(names), 5)
+        self.assertEqual(len(set(names)), 5)
+        self.assertNotIn("new tag", names)
+
+    def test_page_size_is_capped(self):
+        '''
+        test with the main purpose that the page size asked by the client
+        can not be bigger than the maximum
+        '''
+        self.client.force_authenticate(user=self.user)
+        with patch.object(CommonCursorPagination, 'max_page_size', 3):
+            response = self.client.get(self.url_list, {'page_size': 1000})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(len(response.json()['results']), 3)
+
+
+class TagSearchTest(APITestBaseCase):
+    '''
+    Tests belong to the prefix search of the tags used by the pickers
+    '''
+    url_search = '/api/tags/search/'
+
+    def setUp(self):
+        for name in ('Vegano', 'vegetariano', 'Sin gluten', 'Verano'):
+            Tag.objects.create(name=name, owner=self.user)
+        Tag.objects.create(name='Vegano', owner=self.other_user)
+        super(TagSearchTest, self).setUp()
+
+    def tearDown(self):
+        Tag.objects.all().delete()
+        super(TagSearchTest, self).tearDown()
+
+    def test_search_by_prefix(self):
+        '''
+        test with the main purpose that the search ignores the case and only
+        returns ids and names of the tags of the user
+        '''
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url_search, {'q': 'veg'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        results = response.json()['results']
+        self.assertEqual([tag['name'] for tag in results], ['Vegano', 'vegetariano'])
+        self.assertEqual(set(results[0].keys()), {'id', 'name'})
+        self.assertIn(results[0]['id'], Tag.objects.filter(owner=self.user).values_list('id', flat=True))
+
+    def test_search_pages(self):
+        self.client.force_authenticate(user=self.user)
+        page = self.client.get(self.url_search, {'q': 'V', 'page_size': 2}).json()
+        names = [tag['name'] for tag in page['results']]
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            names += [tag['name'] for tag in page['results']]
+        self.assertCountEqual(names, ['Vegano', 'Verano', 'vegetariano'])
+
+    def test_search_needs_login(self):
+        response = self.client.get(self.url_search, {'q': 'veg'})
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+
+class TagBulkTest(APITestBaseCase):
+    '''
+    Tests belong to the bulk creation of tags
+    '''
+    url_bulk = '/api/tags/bulk/'
+
+    def tearDown(self):
+        Tag.objects.all().delete()
+        super(TagBulkTest, self).tearDown()
+
+    def test_bulk_create_tags(self):
+        '''
+        test with the main purpose that the user can create many tags in
+        one request
+        '''
+        self.client.force_authenticate(user=self.user)
+        data = [{"name": "tag {}".format(index)} for index in range(5)]
+        response = self.client.post(self.url_bulk, data, format='json')
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(len(response.json()), 5)
+        self.assertEqual(Tag.objects.filter(owner=self.user).count(), 5)
+
+    def test_bulk_update_tags(self):
+        self.client.force_authenticate(user=self.user)
+        tags = [Tag.objects.create(name="tag {}".format(index), owner=self.user) for index in range(3)]
+        data = [{"id": tag.id, "name": "renamed {}".format(tag.id)} for tag in tags]
+        response = self.client.put(self.url_bulk, data, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([element['name'] for element in response.json()], [item['name'] for item in data])
+        self.assertEqual(
+            sorted(Tag.objects.values_list('name', flat=True)),
+            sorted(item['name'] for item in data)
+        )
+
+
+class TagQueryBudgetTest(QueryBudgetMixin, APITestBaseCase):
+    '''
+    Query budgets of the tag endpoints
+    '''
+    query_budgets = {
+        '/api/tags/': 1,
+        '/api/tags/{self.tag.id}/': 1,
+    }
+
+    def create_query_budget_data(self):
+        for index in range(5):
+            self.tag = Tag.objects.create(name="tag {}".format(index), owner=self.user)
@@ -2,32 +2,24 @@ from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.urls import reverse_lazy
 
-from rest_framework.authentication import SessionAuthentication, BasicAuthentication
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from rest_framework import viewsets
-
 from commons.views import CommonMixinListView, CommonMixinCreateView,\
-    CommonMixinUpdateView, CommonMixinDeleteView
+    CommonMixinUpdateView, CommonMixinDeleteView, CommonMixinViewSet, BulkCreateMixin,\
+    SearchMixin
 from .models import Tag
 from .forms import TagModelForm
 from .serializers import TagSerializer
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(SearchMixin, BulkCreateMixin, CommonMixinViewSet):
     '''
     View for Tag
     '''
-    authentication_classes = (SessionAuthentication, BasicAuthentication)
-    permission_classes = (IsAuthenticated, IsAuthenticatedOrReadOnly)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-    def get_queryset(self):
-        return Tag.objects.filter(owner=self.request.user)
-
 
 @method_decorator(login_required, name='dispatch')
 class TagListView(CommonMixinListView):